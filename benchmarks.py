@@ -0,0 +1,201 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from conjunto_candidatos import ConjuntoCandidatos
+from estrategias import tabla_particiones
+from mastermind_solver import COLORES, MastermindKB, MastermindSolver
+from motor_feedback import obtener_motor
+from operadores_logicos import And, Or, Implication, Symbol, _symbol_truth_table, model_check
+
+SEMILLA = 12345
+REPETICIONES = 5
+UMBRAL = 0.15
+SEGUNDOS_MINIMOS = 0.05
+
+Preparacion = Callable[[random.Random], Tuple[Callable[[], object], int]]
+
+@dataclass
+class ResultadoBenchmark:
+    nombre: str
+    operaciones: int
+    repeticiones: int
+    segundos_min: float
+    segundos_mediana: float
+    operaciones_por_segundo: float
+
+def _candidatos_aleatorios(rng: random.Random, num_codigos: int, tamano: int) -> ConjuntoCandidatos:
+    return ConjuntoCandidatos.desde_indices(rng.sample(range(num_codigos), tamano), num_codigos)
+
+def _feedback(tamano: int) -> Preparacion:
+    def preparar(rng: random.Random):
+        motor = obtener_motor(tuple(COLORES), 4)
+        posibles = _candidatos_aleatorios(rng, motor.num_codigos, tamano).indices()
+        jugadas = np.arange(motor.num_codigos)
+        return (lambda: tabla_particiones(motor, posibles, jugadas)), motor.num_codigos * tamano
+    return preparar
+
+def _filtrado(tamano: int, colores: Tuple[str, ...] = tuple(COLORES), num_posiciones: int = 4) -> Preparacion:
+    def preparar(rng: random.Random):
+        motor = obtener_motor(colores, num_posiciones)
+        candidatos = _candidatos_aleatorios(rng, motor.num_codigos, tamano)
+        jugadas = [rng.randrange(motor.num_codigos) for _ in range(16)]
+        codigos = [motor.feedback_jugada(jugada, np.array([candidatos.elemento(0)]))[0] for jugada in jugadas]
+
+        def ejecutar():
+            for jugada, codigo in zip(jugadas, codigos):
+                motor.filtrar(candidatos, jugada, int(codigo))
+        return ejecutar, len(jugadas)
+    return preparar
+
+def _kb_con_historial(rng: random.Random, tamano_maximo: int, estrategia: str) -> MastermindKB:
+    kb = MastermindKB(estrategia=estrategia, usar_libro=False, cache=None)
+    secreto = kb.motor.combinacion(rng.randrange(kb.motor.num_codigos))
+    while kb.tamano_espacio_busqueda() > tamano_maximo:
+        jugada = kb.motor.combinacion(rng.randrange(kb.motor.num_codigos))
+        kb.actualizar_con_feedback(jugada, *kb.motor.feedback(jugada, secreto))
+    return kb
+
+def _siguiente_combinacion(tamano_maximo: int, estrategia: str = "knuth") -> Preparacion:
+    def preparar(rng: random.Random):
+        kb = _kb_con_historial(rng, tamano_maximo, estrategia)
+        return kb.siguiente_combinacion, 1
+    return preparar
+
+def _partidas(num_juegos: int, estrategia: str = "knuth") -> Preparacion:
+    def preparar(rng: random.Random):
+        solver = MastermindSolver(estrategia=estrategia, cache=None)
+        solver.kb._consultar_libro()
+        secretos = [tuple(rng.choice(COLORES) for _ in range(4)) for _ in range(num_juegos)]
+
+        def ejecutar():
+            for secreto in secretos:
+                solver.modo_automatico(secreto)
+        return ejecutar, num_juegos
+    return preparar
+
+def _model_check(num_simbolos: int) -> Preparacion:
+    def preparar(rng: random.Random):
+        simbolos = [Symbol(f"b{i}") for i in range(num_simbolos)]
+        knowledge = And([Implication(simbolos[i], simbolos[i + 1]) for i in range(num_simbolos - 1)]
+                        + [Or([simbolos[0], simbolos[rng.randrange(1, num_simbolos)]])])
+        consulta = simbolos[-1]
+
+        def ejecutar():
+            _symbol_truth_table.cache_clear()
+            return model_check(knowledge, consulta)
+        return ejecutar, 1
+    return preparar
+
+BENCHMARKS: Dict[str, Preparacion] = {
+    "feedback_tabla_64": _feedback(64),
+    "feedback_tabla_1296": _feedback(1296),
+    "filtrado_4x6_1296": _filtrado(1296),
+    "filtrado_5x8_32768": _filtrado(32768, tuple(COLORES) + ("amarillo", "naranja"), 5),
+    "siguiente_knuth_20": _siguiente_combinacion(20),
+    "siguiente_knuth_200": _siguiente_combinacion(200),
+    "siguiente_knuth_apertura": _siguiente_combinacion(1296),
+    "siguiente_entropia_200": _siguiente_combinacion(200, "entropia"),
+    "partidas_knuth_100": _partidas(100),
+    "model_check_8": _model_check(8),
+    "model_check_14": _model_check(14),
+    "model_check_18": _model_check(18),
+}
+
+def medir(nombre: str, preparar: Preparacion, semilla: int = SEMILLA,
+          repeticiones: int = REPETICIONES) -> ResultadoBenchmark:
+    ejecutar, operaciones = preparar(random.Random(f"{semilla}:{nombre}"))
+    vueltas = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(vueltas):
+            ejecutar()
+        if time.perf_counter() - inicio >= SEGUNDOS_MINIMOS:
+            break
+        vueltas *= 2
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(vueltas):
+            ejecutar()
+        tiempos.append((time.perf_counter() - inicio) / vueltas)
+    mediana = statistics.median(tiempos)
+    return ResultadoBenchmark(nombre, operaciones, repeticiones, min(tiempos), mediana,
+                              operaciones / mediana if mediana else float('inf'))
+
+def ejecutar_benchmarks(filtro: Optional[str] = None, semilla: int = SEMILLA,
+                        repeticiones: int = REPETICIONES) -> dict:
+    resultados = {}
+    for nombre, preparar in BENCHMARKS.items():
+        if filtro and filtro not in nombre:
+            continue
+        resultado = medir(nombre, preparar, semilla, repeticiones)
+        print(f"{nombre:<28} {resultado.segundos_mediana * 1e3:>10.3f} ms  "
+              f"{resultado.operaciones_por_segundo:>14.1f} op/s", file=sys.stderr)
+        resultados[nombre] = asdict(resultado)
+    return {
+        "semilla": semilla,
+        "repeticiones": repeticiones,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "maquina": platform.machine(),
+        "benchmarks": resultados,
+    }
+
+def comparar(base: dict, actual: dict, umbral: float = UMBRAL) -> List[str]:
+    regresiones = []
+    for nombre, medido in actual["benchmarks"].items():
+        referencia = base["benchmarks"].get(nombre)
+        if referencia is None:
+            continue
+        cambio = medido["segundos_min"] / referencia["segundos_min"] - 1
+        estado = "REGRESIÓN" if cambio > umbral else "ok"
+        print(f"{nombre:<28} {referencia['segundos_min'] * 1e3:>10.3f} ms -> "
+              f"{medido['segundos_min'] * 1e3:>10.3f} ms  {cambio:+7.1%}  {estado}")
+        if cambio > umbral:
+            regresiones.append(nombre)
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles del solucionador de Mastermind")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    ejecutar = subparsers.add_parser("ejecutar", help="mide los benchmarks y guarda una línea base JSON")
+    ejecutar.add_argument("--salida", default="benchmarks.json")
+    ejecutar.add_argument("--filtro", default=None, help="sólo benchmarks cuyo nombre contenga este texto")
+    ejecutar.add_argument("--semilla", type=int, default=SEMILLA)
+    ejecutar.add_argument("--repeticiones", type=int, default=REPETICIONES)
+
+    comparar_parser = subparsers.add_parser("comparar", help="compara dos líneas base JSON")
+    comparar_parser.add_argument("base")
+    comparar_parser.add_argument("actual")
+    comparar_parser.add_argument("--umbral", type=float, default=UMBRAL,
+                                 help="aumento relativo del mejor tiempo tolerado (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    if args.comando == "ejecutar":
+        resultados = ejecutar_benchmarks(args.filtro, args.semilla, args.repeticiones)
+        with open(args.salida, "w") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Línea base guardada en '{args.salida}'", file=sys.stderr)
+        return
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.actual) as f:
+        actual = json.load(f)
+    regresiones = comparar(base, actual, args.umbral)
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones por encima del {args.umbral:.0%}: {', '.join(regresiones)}")
+        sys.exit(1)
+    print("\nSin regresiones.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import argparse
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from conjunto_candidatos import ConjuntoCandidatos
+from estrategias import ESTRATEGIAS, LIMITE_JUGADAS, TAMANO_LOTE, jugadas_a_evaluar, tabla_particiones
+from libro_aperturas import Libro, cargar_libro, guardar_libro, ruta_libro
+from motor_feedback import MotorFeedback, obtener_motor
+from simetrias import representantes
+
+OBJETIVOS = ("peor_caso", "total")
+ANCHO_TOTAL = 8
+ANCHO_TABLERO_GRANDE = 2
+
+Solucion = Tuple[int, int, int]
+
+@dataclass
+class ResultadoBusqueda:
+    libro: Libro
+    objetivo: str
+    peor_caso: int
+    total_intentos: int
+    promedio_intentos: float
+    nodos: int
+    segundos: float
+    exacto: bool
+    profundidad: int
+
+class BuscadorOptimo:
+
+    def __init__(self, motor: MotorFeedback, objetivo: str = "peor_caso", ancho: Optional[int] = None):
+        if objetivo not in OBJETIVOS:
+            raise ValueError(f"Objetivo '{objetivo}' no válido. Los objetivos válidos son: {', '.join(OBJETIVOS)}")
+        self.motor = motor
+        self.objetivo = objetivo
+        self.ancho = ancho
+        self.ganador = motor.codificar(motor.num_posiciones, 0)
+        self.num_respuestas = sum(
+            1 for negras in range(motor.num_posiciones + 1)
+            for blancas in range(motor.num_posiciones + 1 - negras)
+            if not (negras == motor.num_posiciones - 1 and blancas == 1)
+        )
+        self.nodos = 0
+        self._capacidades = [0]
+        self._exitos: Dict[ConjuntoCandidatos, Tuple[int, Solucion]] = {}
+        self._fallos: Dict[ConjuntoCandidatos, int] = {}
+        self._optimos: Dict[Tuple[ConjuntoCandidatos, int], Optional[Solucion]] = {}
+
+    def capacidad(self, profundidad: int) -> int:
+        while len(self._capacidades) <= profundidad:
+            self._capacidades.append(1 + (self.num_respuestas - 1) * self._capacidades[-1])
+        return self._capacidades[profundidad]
+
+    def profundidad_minima(self, tamano: int) -> int:
+        profundidad = 0
+        while self.capacidad(profundidad) < tamano:
+            profundidad += 1
+        return profundidad
+
+    def cota_total(self, tamano: int) -> int:
+        total, nivel, restante = 0, 1, tamano
+        while restante > 0:
+            cabida = min(restante, 1 if nivel == 1 else (self.num_respuestas - 1) ** (nivel - 1))
+            total += nivel * cabida
+            restante -= cabida
+            nivel += 1
+        return total
+
+    def _jugadas_posibles(self, candidatos: ConjuntoCandidatos, jugadas_previas: List[int]) -> np.ndarray:
+        if len(candidatos) * self.motor.num_codigos > TAMANO_LOTE:
+            return jugadas_a_evaluar(self.motor, candidatos, jugadas_previas)
+        reducidas = representantes(self.motor, jugadas_previas)
+        return reducidas if reducidas is not None else np.arange(self.motor.num_codigos)
+
+    def _ordenar(self, candidatos: ConjuntoCandidatos, jugadas: np.ndarray, profundidad: int) -> np.ndarray:
+        particiones = tabla_particiones(self.motor, candidatos.indices(), jugadas)
+        es_candidata = candidatos.contiene(jugadas)
+        particiones[:, self.ganador] = 0
+        mayores = particiones.max(axis=1)
+
+        utiles = (mayores <= self.capacidad(profundidad - 1)) & (es_candidata | (mayores < len(candidatos)))
+        if self.objetivo == "total":
+            clave = (particiones.astype(np.int64) ** 2).sum(axis=1) - es_candidata
+        else:
+            clave = mayores
+        orden = np.lexsort((jugadas, ~es_candidata, clave))
+        return jugadas[orden[utiles[orden]]]
+
+    def _jugadas_ordenadas(self, candidatos: ConjuntoCandidatos, jugadas_previas: List[int],
+                           profundidad: int) -> Iterator[int]:
+        jugadas = self._jugadas_posibles(candidatos, jugadas_previas)
+        fases = [jugadas]
+        if self.objetivo == "peor_caso":
+            propias = candidatos.contiene(jugadas)
+            fases = [candidatos.indices(), jugadas[~propias]]
+
+        restantes = self.ancho
+        for fase in fases:
+            for jugada in self._ordenar(candidatos, fase, profundidad).tolist():
+                if restantes is not None:
+                    if restantes == 0:
+                        return
+                    restantes -= 1
+                yield jugada
+
+    def _es_caso_base(self, candidatos: ConjuntoCandidatos, profundidad: int) -> bool:
+        return len(candidatos) <= 2 or len(candidatos) > self.capacidad(profundidad)
+
+    def _caso_base(self, candidatos: ConjuntoCandidatos, profundidad: int) -> Optional[Solucion]:
+        if len(candidatos) > self.capacidad(profundidad):
+            return None
+        if len(candidatos) == 1:
+            return (candidatos.elemento(0), 1, 1)
+        return (candidatos.elemento(0), 2, 3)
+
+    def resolver(self, candidatos: ConjuntoCandidatos, historial: List[Tuple[int, int]],
+                 profundidad: int) -> Optional[Solucion]:
+        if self.objetivo == "total":
+            return self._resolver_total(candidatos, historial, profundidad)
+        return self._resolver_peor_caso(candidatos, historial, profundidad)
+
+    def _resolver_peor_caso(self, candidatos: ConjuntoCandidatos, historial: List[Tuple[int, int]],
+                            profundidad: int) -> Optional[Solucion]:
+        if self._es_caso_base(candidatos, profundidad):
+            return self._caso_base(candidatos, profundidad)
+
+        exito = self._exitos.get(candidatos)
+        if exito is not None and exito[1][1] <= profundidad:
+            return exito[1]
+        if self._fallos.get(candidatos, 0) >= profundidad:
+            return None
+
+        self.nodos += 1
+        jugadas_previas = [jugada for jugada, _ in historial]
+        for jugada in self._jugadas_ordenadas(candidatos, jugadas_previas, profundidad):
+            partes = self.motor.particionar(candidatos, jugada)
+            peor, total = 1, len(candidatos)
+            for codigo, parte in sorted(partes.items(), key=lambda item: -len(item[1])):
+                if codigo == self.ganador:
+                    continue
+                solucion = self._resolver_peor_caso(parte, historial + [(jugada, codigo)], profundidad - 1)
+                if solucion is None:
+                    break
+                peor, total = max(peor, solucion[1] + 1), total + solucion[2]
+            else:
+                resultado = (jugada, peor, total)
+                self._exitos[candidatos] = (profundidad, resultado)
+                return resultado
+
+        self._fallos[candidatos] = max(self._fallos.get(candidatos, 0), profundidad)
+        return None
+
+    def _resolver_total(self, candidatos: ConjuntoCandidatos, historial: List[Tuple[int, int]],
+                        profundidad: int) -> Optional[Solucion]:
+        if self._es_caso_base(candidatos, profundidad):
+            return self._caso_base(candidatos, profundidad)
+
+        clave = (candidatos, profundidad)
+        if clave in self._optimos:
+            return self._optimos[clave]
+
+        self.nodos += 1
+        mejor: Optional[Solucion] = None
+        jugadas_previas = [jugada for jugada, _ in historial]
+        for jugada in self._jugadas_ordenadas(candidatos, jugadas_previas, profundidad):
+            partes = sorted(
+                ((codigo, parte) for codigo, parte in self.motor.particionar(candidatos, jugada).items()
+                 if codigo != self.ganador),
+                key=lambda item: -len(item[1])
+            )
+            cotas = [self.cota_total(len(parte)) for _, parte in partes]
+            pendiente = sum(cotas)
+            peor, total = 1, len(candidatos)
+            if mejor is not None and total + pendiente >= mejor[2]:
+                continue
+            for (codigo, parte), cota in zip(partes, cotas):
+                solucion = self._resolver_total(parte, historial + [(jugada, codigo)], profundidad - 1)
+                if solucion is None:
+                    break
+                pendiente -= cota
+                peor, total = max(peor, solucion[1] + 1), total + solucion[2]
+                if mejor is not None and total + pendiente >= mejor[2]:
+                    break
+            else:
+                mejor = (jugada, peor, total)
+
+        self._optimos[clave] = mejor
+        return mejor
+
+    def solucion(self, candidatos: ConjuntoCandidatos, profundidad: int) -> Optional[Solucion]:
+        if self._es_caso_base(candidatos, profundidad):
+            return self._caso_base(candidatos, profundidad)
+        if self.objetivo == "total":
+            return self._optimos.get((candidatos, profundidad))
+        exito = self._exitos.get(candidatos)
+        return exito[1] if exito is not None and exito[1][1] <= profundidad else None
+
+    def exportar(self, profundidad: int) -> Libro:
+        libro: Libro = {}
+
+        def expandir(prefijo: Tuple[int, ...], candidatos: ConjuntoCandidatos, restante: int) -> None:
+            jugada = self.solucion(candidatos, restante)[0]
+            libro[prefijo] = jugada
+            for codigo, parte in sorted(self.motor.particionar(candidatos, jugada).items()):
+                if codigo != self.ganador:
+                    expandir(prefijo + (codigo,), parte, restante - 1)
+
+        expandir((), ConjuntoCandidatos.completo(self.motor.num_codigos), profundidad)
+        return libro
+
+    def buscar(self, profundidad_maxima: Optional[int] = None) -> ResultadoBusqueda:
+        inicio = time.time()
+        completo = ConjuntoCandidatos.completo(self.motor.num_codigos)
+        profundidad = self.profundidad_minima(self.motor.num_codigos)
+        limite = profundidad_maxima if profundidad_maxima is not None else self.motor.num_codigos
+
+        while self._resolver_peor_caso(completo, [], profundidad) is None:
+            profundidad += 1
+            if profundidad > limite:
+                raise ValueError(f"No existe una estrategia que resuelva en {limite} intentos o menos")
+
+        if self.objetivo == "total" and profundidad_maxima is not None:
+            profundidad = limite
+            if self._resolver_total(completo, [], profundidad) is None:
+                raise ValueError(f"No existe una estrategia que resuelva en {profundidad} intentos o menos")
+        elif self.objetivo == "total":
+            mejor = self._resolver_total(completo, [], profundidad)
+            while profundidad < limite:
+                siguiente = self._resolver_total(completo, [], profundidad + 1)
+                if siguiente[2] >= mejor[2]:
+                    break
+                profundidad, mejor = profundidad + 1, siguiente
+
+        libro = self.exportar(profundidad)
+        peor, total = evaluar_libro(self.motor, libro)
+        return ResultadoBusqueda(libro, self.objetivo, peor, total, total / self.motor.num_codigos,
+                                 self.nodos, time.time() - inicio,
+                                 self.es_exacto(profundidad_maxima is not None), profundidad)
+
+    def es_exacto(self, profundidad_fijada: bool = True) -> bool:
+        if self.objetivo == "total" and not profundidad_fijada:
+            return False
+        return self.ancho is None and self.motor.num_codigos <= LIMITE_JUGADAS
+
+def evaluar_libro(motor: MotorFeedback, libro: Libro) -> Tuple[int, int]:
+    ganador = motor.codificar(motor.num_posiciones, 0)
+    peor, total = 0, 0
+
+    def recorrer(prefijo: Tuple[int, ...], candidatos: ConjuntoCandidatos) -> None:
+        nonlocal peor, total
+        jugada = libro[prefijo]
+        for codigo, parte in motor.particionar(candidatos, jugada).items():
+            if codigo == ganador:
+                peor = max(peor, len(prefijo) + 1)
+                total += len(prefijo) + 1
+            else:
+                recorrer(prefijo + (codigo,), parte)
+
+    recorrer((), ConjuntoCandidatos.completo(motor.num_codigos))
+    return peor, total
+
+def nombre_arbol(objetivo: str, ancho: Optional[int] = None, profundidad_maxima: Optional[int] = None) -> str:
+    nombre = f"optimo_{objetivo}"
+    if ancho is not None:
+        nombre += f"_ancho{ancho}"
+    if profundidad_maxima is not None:
+        nombre += f"_prof{profundidad_maxima}"
+    return nombre
+
+def metadatos_arbol(buscador: "BuscadorOptimo", profundidad_maxima: Optional[int] = None) -> dict:
+    return {
+        "ancho": buscador.ancho,
+        "profundidad_maxima": profundidad_maxima,
+        "exacto": buscador.es_exacto(profundidad_maxima is not None),
+    }
+
+def ancho_por_defecto(motor: MotorFeedback, objetivo: str) -> Optional[int]:
+    if objetivo == "total":
+        return ANCHO_TOTAL
+    if motor.num_codigos > LIMITE_JUGADAS:
+        return ANCHO_TABLERO_GRANDE
+    return None
+
+@lru_cache(maxsize=None)
+def obtener_arbol_optimo(colores: Tuple[str, ...], num_posiciones: int, objetivo: str = "peor_caso",
+                         ancho: Optional[int] = None) -> Libro:
+    motor = obtener_motor(colores, num_posiciones)
+    if ancho is None:
+        ancho = ancho_por_defecto(motor, objetivo)
+    buscador = BuscadorOptimo(motor, objetivo, ancho)
+    nombre, metadatos = nombre_arbol(objetivo, ancho), metadatos_arbol(buscador)
+    ruta = ruta_libro(colores, num_posiciones, nombre)
+    libro = cargar_libro(ruta, colores, num_posiciones, nombre, metadatos)
+    if libro is not None:
+        return libro
+
+    libro = buscador.buscar().libro
+    try:
+        guardar_libro(libro, ruta, colores, num_posiciones, nombre, metadatos)
+    except OSError:
+        pass
+    return libro
+
+@lru_cache(maxsize=None)
+def _jugadas_por_candidatos(colores: Tuple[str, ...], num_posiciones: int,
+                            objetivo: str) -> Dict[ConjuntoCandidatos, int]:
+    motor = obtener_motor(colores, num_posiciones)
+    libro = obtener_arbol_optimo(colores, num_posiciones, objetivo)
+    jugadas: Dict[ConjuntoCandidatos, int] = {}
+
+    def expandir(prefijo: Tuple[int, ...], candidatos: ConjuntoCandidatos) -> None:
+        jugada = libro[prefijo]
+        jugadas[candidatos] = jugada
+        for codigo, parte in motor.particionar(candidatos, jugada).items():
+            if prefijo + (codigo,) in libro:
+                expandir(prefijo + (codigo,), parte)
+
+    expandir((), ConjuntoCandidatos.completo(motor.num_codigos))
+    return jugadas
+
+def jugada_optima(motor: MotorFeedback, candidatos: ConjuntoCandidatos, objetivo: str = "peor_caso",
+                  jugadas_previas: Optional[Sequence[int]] = None) -> int:
+    if len(candidatos) <= 2:
+        return candidatos.elemento(0)
+    jugada = _jugadas_por_candidatos(motor.colores, motor.num_posiciones, objetivo).get(candidatos)
+    if jugada is None:
+        return ESTRATEGIAS["knuth"](motor, candidatos, jugadas_previas)
+    return jugada
+
+def main():
+    from mastermind_solver import COLORES
+
+    parser = argparse.ArgumentParser(description="Búsqueda de estrategias óptimas de Mastermind")
+    parser.add_argument("--objetivo", choices=OBJETIVOS, default="peor_caso")
+    parser.add_argument("--colores", default=",".join(COLORES), help="lista de colores separada por comas")
+    parser.add_argument("--posiciones", type=int, default=4)
+    parser.add_argument("--ancho", type=int, default=None,
+                        help=f"jugadas probadas por nodo (por defecto {ANCHO_TOTAL} con --objetivo total)")
+    parser.add_argument("--exacta", action="store_true",
+                        help="prueba todas las jugadas en cada nodo; con --objetivo total puede tardar horas")
+    parser.add_argument("--profundidad", type=int, default=None, help="máximo de intentos permitido")
+    parser.add_argument("--salida", default=None, help="ruta del árbol exportado (formato de libro)")
+    args = parser.parse_args()
+    if args.exacta and args.ancho is not None:
+        parser.error("--exacta y --ancho son incompatibles")
+
+    colores = tuple(color.strip() for color in args.colores.split(",") if color.strip())
+    motor = obtener_motor(colores, args.posiciones)
+    ancho = None if args.exacta else args.ancho if args.ancho is not None else ancho_por_defecto(motor, args.objetivo)
+    buscador = BuscadorOptimo(motor, args.objetivo, ancho)
+    resultado = buscador.buscar(args.profundidad)
+
+    print(f"Objetivo: {resultado.objetivo} ({'exacto' if resultado.exacto else 'acotado'}, "
+          f"con un máximo de {resultado.profundidad} intentos)")
+    print(f"Peor caso: {resultado.peor_caso} intentos")
+    print(f"Promedio: {resultado.promedio_intentos:.4f} intentos ({resultado.total_intentos} en total)")
+    print(f"Nodos expandidos: {resultado.nodos}, tiempo: {resultado.segundos:.2f} segundos")
+
+    nombre = nombre_arbol(args.objetivo, ancho, args.profundidad)
+    ruta = args.salida or ruta_libro(colores, args.posiciones, nombre)
+    guardar_libro(resultado.libro, ruta, colores, args.posiciones, nombre,
+                  metadatos_arbol(buscador, args.profundidad))
+    print(f"Árbol guardado en '{ruta}'")
+
+if __name__ == "__main__":
+    main()
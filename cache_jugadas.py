@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+from conjunto_candidatos import ConjuntoCandidatos
+
+LIMITE_HUELLA_EXACTA = 1 << 12
+
+def huella(candidatos: ConjuntoCandidatos) -> Hashable:
+    if candidatos.num_codigos <= LIMITE_HUELLA_EXACTA:
+        return candidatos.mascara
+    datos = candidatos.mascara.to_bytes((candidatos.num_codigos + 7) // 8, "little")
+    return (len(candidatos), hashlib.blake2b(datos, digest_size=16).digest())
+
+class CacheJugadas:
+
+    def __init__(self, capacidad: int = 1 << 16):
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas: "OrderedDict[Tuple, int]" = OrderedDict()
+        self._bloqueo = threading.Lock()
+
+    def clave(self, contexto: Tuple, candidatos: ConjuntoCandidatos) -> Tuple:
+        return contexto + (candidatos.num_codigos, huella(candidatos))
+
+    def obtener(self, contexto: Tuple, candidatos: ConjuntoCandidatos) -> Optional[int]:
+        clave = self.clave(contexto, candidatos)
+        with self._bloqueo:
+            jugada = self._entradas.get(clave)
+            if jugada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return jugada
+
+    def guardar(self, contexto: Tuple, candidatos: ConjuntoCandidatos, jugada: int) -> None:
+        clave = self.clave(contexto, candidatos)
+        with self._bloqueo:
+            self._entradas[clave] = jugada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self) -> None:
+        with self._bloqueo:
+            self._entradas.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def estadisticas(self) -> Dict[str, float]:
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "entradas": len(self._entradas),
+            "capacidad": self.capacidad,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+CACHE_JUGADAS = CacheJugadas()
@@ -0,0 +1,149 @@
+import random
+from typing import Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+LIMITE_ESCANEO = 1 << 14
+
+class ConjuntoCandidatos:
+    __slots__ = ("mascara", "num_codigos", "_tamano")
+
+    def __init__(self, mascara: int, num_codigos: int, tamano: Optional[int] = None):
+        self.mascara = mascara
+        self.num_codigos = num_codigos
+        self._tamano = tamano
+
+    @classmethod
+    def completo(cls, num_codigos: int) -> "ConjuntoCandidatos":
+        return cls((1 << num_codigos) - 1, num_codigos, num_codigos)
+
+    @classmethod
+    def desde_indices(cls, indices: Iterable[int], num_codigos: int) -> "ConjuntoCandidatos":
+        bits = np.zeros(num_codigos, dtype=bool)
+        bits[np.fromiter(indices, dtype=np.int64)] = True
+        return cls(mascara_desde_bits(bits), num_codigos)
+
+    def __len__(self) -> int:
+        if self._tamano is None:
+            self._tamano = self.mascara.bit_count()
+        return self._tamano
+
+    def __bool__(self) -> bool:
+        return self.mascara != 0
+
+    def __contains__(self, indice: int) -> bool:
+        return (self.mascara >> int(indice)) & 1 == 1
+
+    def __iter__(self) -> Iterator[int]:
+        if self.num_codigos > LIMITE_ESCANEO:
+            for _, indices in self.bloques(1 << 16):
+                yield from indices.tolist()
+            return
+
+        mascara = self.mascara
+        while mascara:
+            bajo = mascara & -mascara
+            yield bajo.bit_length() - 1
+            mascara ^= bajo
+
+    def __and__(self, otro) -> "ConjuntoCandidatos":
+        mascara = otro.mascara if isinstance(otro, ConjuntoCandidatos) else otro
+        return ConjuntoCandidatos(self.mascara & mascara, self.num_codigos)
+
+    def __eq__(self, otro) -> bool:
+        return (isinstance(otro, ConjuntoCandidatos) and self.mascara == otro.mascara
+                and self.num_codigos == otro.num_codigos)
+
+    def __hash__(self) -> int:
+        return hash((self.mascara, self.num_codigos))
+
+    def __repr__(self):
+        return f"ConjuntoCandidatos({len(self)}/{self.num_codigos})"
+
+    def _palabras(self) -> np.ndarray:
+        return np.frombuffer(self.mascara.to_bytes(8 * ((self.num_codigos + 63) // 64), "little"), dtype="<u8")
+
+    def indices(self) -> np.ndarray:
+        palabras = self._palabras()
+        ocupadas = np.flatnonzero(palabras)
+        bits = np.unpackbits(palabras[ocupadas].view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        return (ocupadas[:, None] * 64 + np.arange(64))[bits.astype(bool)]
+
+    def bloques(self, tamano_bloque: int) -> Iterator[Tuple[int, np.ndarray]]:
+        bytes_mascara = self.mascara.to_bytes((self.num_codigos + 7) // 8, "little")
+        paso = tamano_bloque // 8
+        for inicio in range(0, len(bytes_mascara), paso):
+            trozo = bytes_mascara[inicio:inicio + paso]
+            if not trozo.strip(b"\x00"):
+                continue
+            bits = np.unpackbits(np.frombuffer(trozo, dtype=np.uint8), bitorder="little")
+            yield inicio * 8, np.flatnonzero(bits) + inicio * 8
+
+    def elementos_en_rangos(self, rangos: np.ndarray) -> np.ndarray:
+        rangos = np.sort(np.asarray(rangos, dtype=np.int64))
+        palabras = self._palabras()
+        ocupadas = np.flatnonzero(palabras)
+        cuentas = _contar_bits(palabras[ocupadas])
+        acumulados = np.cumsum(cuentas)
+        posicion = np.searchsorted(acumulados, rangos, side="right")
+        dentro = rangos - (acumulados[posicion] - cuentas[posicion])
+
+        filas = np.arange(len(rangos))
+        bytes_palabra = palabras[ocupadas[posicion]].view(np.uint8).reshape(-1, 8)
+        cuentas_bytes = _BITS_POR_BYTE[bytes_palabra].astype(np.int64)
+        acumulados_bytes = np.cumsum(cuentas_bytes, axis=1)
+        byte = (acumulados_bytes <= dentro[:, None]).sum(axis=1)
+        dentro -= acumulados_bytes[filas, byte] - cuentas_bytes[filas, byte]
+        return ocupadas[posicion] * 64 + byte * 8 + _SELECCION_BIT[bytes_palabra[filas, byte], dentro]
+
+    def submuestra(self, k: int) -> np.ndarray:
+        if len(self) <= k:
+            return self.indices()
+        rangos = (np.arange(k) * len(self)) // k
+        if len(self) == self.num_codigos:
+            return rangos
+        return self.elementos_en_rangos(rangos)
+
+    def contiene(self, indices: np.ndarray) -> np.ndarray:
+        indices = np.asarray(indices, dtype=np.int64)
+        bytes_mascara = self._palabras().view(np.uint8)
+        return ((bytes_mascara[indices >> 3] >> (indices & 7)) & 1).astype(bool)
+
+    def elemento(self, rango: int) -> int:
+        if not 0 <= rango < len(self):
+            raise IndexError(f"rango {rango} fuera del conjunto de {len(self)} candidatos")
+
+        if self.num_codigos > LIMITE_ESCANEO:
+            return int(self.elementos_en_rangos(np.array([rango]))[0])
+
+        mascara = self.mascara
+        base = 0
+        while True:
+            palabra = mascara & 0xFFFFFFFFFFFFFFFF
+            cantidad = palabra.bit_count()
+            if rango < cantidad:
+                for _ in range(rango):
+                    palabra &= palabra - 1
+                return base + (palabra & -palabra).bit_length() - 1
+            rango -= cantidad
+            mascara >>= 64
+            base += 64
+
+    def muestrear(self, k: int, rng: random.Random = random) -> List[int]:
+        rangos = rng.sample(range(len(self)), k)
+        if k == 1:
+            return [self.elemento(rangos[0])]
+        elementos = self.elementos_en_rangos(np.array(rangos))
+        posicion = np.argsort(np.argsort(rangos))
+        return [int(elementos[i]) for i in posicion]
+
+_BITS_POR_BYTE = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+_SELECCION_BIT = np.array([[([bit for bit in range(8) if byte >> bit & 1] + [0] * 8)[k] for k in range(8)]
+                           for byte in range(256)], dtype=np.int64)
+
+def _contar_bits(palabras: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(palabras).astype(np.int64)
+    return _BITS_POR_BYTE[palabras.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+def mascara_desde_bits(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
@@ -0,0 +1,231 @@
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple, Union
+import numpy as np
+from conjunto_candidatos import ConjuntoCandidatos
+from motor_feedback import TAMANO_BLOQUE, MotorFeedback
+from simetrias import representantes
+
+Estrategia = Callable[[MotorFeedback, ConjuntoCandidatos], int]
+
+APERTURA_APROXIMADA = ("azul", "azul", "rojo", "verde")
+
+LIMITE_JUGADAS = 2048
+LIMITE_CANDIDATOS = 4096
+TAMANO_LOTE = 1 << 21
+PRIMER_BLOQUE_PLAZO = 16
+
+@dataclass
+class Cobertura:
+    evaluadas: int
+    total: int
+    candidatos_puntuados: int
+    candidatos: int
+    segundos: float
+
+    @property
+    def fraccion(self) -> float:
+        return self.evaluadas / self.total if self.total else 1.0
+
+    @property
+    def completa(self) -> bool:
+        return self.evaluadas >= self.total
+
+def jugadas_a_evaluar(motor: MotorFeedback, candidatos: ConjuntoCandidatos,
+                      jugadas_previas: Optional[Sequence[int]] = None) -> np.ndarray:
+    if jugadas_previas is not None:
+        reducidas = representantes(motor, jugadas_previas)
+        if reducidas is not None and (motor.num_codigos <= LIMITE_JUGADAS or len(reducidas) <= LIMITE_JUGADAS):
+            return reducidas
+    if motor.num_codigos <= LIMITE_JUGADAS:
+        return np.arange(motor.num_codigos)
+    return candidatos.submuestra(LIMITE_JUGADAS)
+
+def tabla_particiones(motor: MotorFeedback, indices_posibles: np.ndarray,
+                      indices_jugadas: np.ndarray) -> np.ndarray:
+    conteos = np.empty((len(indices_jugadas), motor.num_feedbacks), dtype=np.int64)
+    paso = max(1, TAMANO_LOTE // max(1, len(indices_posibles)))
+    for inicio in range(0, len(indices_jugadas), paso):
+        jugadas = indices_jugadas[inicio:inicio + paso]
+        submatriz = motor.feedback_contra(jugadas, indices_posibles)
+        desplazamientos = np.arange(len(jugadas))[:, None] * motor.num_feedbacks
+        conteos[inicio:inicio + len(jugadas)] = np.bincount(
+            (submatriz + desplazamientos).ravel(), minlength=len(jugadas) * motor.num_feedbacks
+        ).reshape(len(jugadas), motor.num_feedbacks)
+    return conteos
+
+def _elegir_mejor(indices_jugadas: np.ndarray, es_candidata: np.ndarray,
+                  puntuaciones: np.ndarray) -> int:
+    orden = np.lexsort((indices_jugadas, ~es_candidata, puntuaciones))
+    return int(indices_jugadas[orden[0]])
+
+def _estrategia_exacta(puntuar: Callable[[np.ndarray], np.ndarray]) -> Estrategia:
+    def estrategia(motor: MotorFeedback, candidatos: ConjuntoCandidatos,
+                   jugadas_previas: Optional[Sequence[int]] = None) -> int:
+        if len(candidatos) <= 2:
+            return candidatos.elemento(0)
+
+        jugadas = jugadas_a_evaluar(motor, candidatos, jugadas_previas)
+        particiones = tabla_particiones(motor, candidatos.submuestra(LIMITE_CANDIDATOS), jugadas)
+        return _elegir_mejor(jugadas, candidatos.contiene(jugadas), puntuar(particiones))
+
+    estrategia.admite_simetrias = True
+    estrategia.puntuar = puntuar
+    return estrategia
+
+def _puntuar_knuth(particiones: np.ndarray) -> np.ndarray:
+    return particiones.max(axis=1)
+
+def _puntuar_tamano_esperado(particiones: np.ndarray) -> np.ndarray:
+    return (particiones.astype(np.int64) ** 2).sum(axis=1)
+
+def _puntuar_entropia(particiones: np.ndarray) -> np.ndarray:
+    total = particiones.sum(axis=1, keepdims=True)
+    probabilidades = particiones / total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terminos = np.where(particiones > 0, probabilidades * np.log2(probabilidades), 0.0)
+    return np.round(terminos.sum(axis=1), 12)
+
+def _puntuar_mas_partes(particiones: np.ndarray) -> np.ndarray:
+    return -(particiones > 0).sum(axis=1)
+
+def jugadas_por_prioridad(motor: MotorFeedback, candidatos: ConjuntoCandidatos,
+                          jugadas_previas: Optional[Sequence[int]] = None
+                          ) -> Tuple[int, Iterator[Tuple[np.ndarray, np.ndarray]]]:
+    reducidas = representantes(motor, jugadas_previas) if jugadas_previas is not None else None
+    if reducidas is not None:
+        es_candidata = candidatos.contiene(reducidas)
+        orden = [(reducidas[es_candidata], np.ones(int(es_candidata.sum()), dtype=bool)),
+                 (reducidas[~es_candidata], np.zeros(int((~es_candidata).sum()), dtype=bool))]
+        return len(reducidas), iter(orden)
+
+    def por_bloques() -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        for _, indices in candidatos.bloques(TAMANO_BLOQUE):
+            yield indices, np.ones(len(indices), dtype=bool)
+        datos = np.frombuffer(candidatos.mascara.to_bytes((motor.num_codigos + 7) // 8, "little"), dtype=np.uint8)
+        for inicio in range(0, motor.num_codigos, TAMANO_BLOQUE):
+            fin = min(inicio + TAMANO_BLOQUE, motor.num_codigos)
+            bits = np.unpackbits(datos[inicio // 8:(fin + 7) // 8], bitorder="little")[:fin - inicio]
+            restantes = np.flatnonzero(bits == 0) + inicio
+            yield restantes, np.zeros(len(restantes), dtype=bool)
+
+    return motor.num_codigos, por_bloques()
+
+def elegir_con_plazo(motor: MotorFeedback, candidatos: ConjuntoCandidatos,
+                     puntuar: Callable[[np.ndarray], np.ndarray] = _puntuar_knuth,
+                     jugadas_previas: Optional[Sequence[int]] = None,
+                     plazo: Optional[float] = None) -> Tuple[int, Cobertura]:
+    inicio = time.monotonic()
+    if len(candidatos) <= 2:
+        return candidatos.elemento(0), Cobertura(1, 1, len(candidatos), len(candidatos), 0.0)
+
+    total, orden = jugadas_por_prioridad(motor, candidatos, jugadas_previas)
+    posibles = candidatos.submuestra(LIMITE_CANDIDATOS)
+    mejor: Optional[Tuple] = None
+    evaluadas, paso = 0, PRIMER_BLOQUE_PLAZO
+    limite_paso = max(PRIMER_BLOQUE_PLAZO, TAMANO_LOTE // len(posibles))
+    agotado = False
+    for jugadas, candidatas in orden:
+        desde = 0
+        while desde < len(jugadas):
+            bloque, es_candidata = jugadas[desde:desde + paso], candidatas[desde:desde + paso]
+            desde += len(bloque)
+            puntuaciones = puntuar(tabla_particiones(motor, posibles, bloque))
+            elegida = int(np.lexsort((bloque, ~es_candidata, puntuaciones))[0])
+            clave = (puntuaciones[elegida], not es_candidata[elegida], int(bloque[elegida]))
+            if mejor is None or clave < mejor:
+                mejor = clave
+            evaluadas += len(bloque)
+            paso = min(paso * 2, limite_paso)
+            if plazo is not None:
+                ahora = time.monotonic()
+                if ahora >= plazo:
+                    agotado = True
+                    break
+                if ahora > inicio:
+                    paso = max(1, min(paso, int((plazo - ahora) * evaluadas / (ahora - inicio))))
+        if agotado:
+            break
+
+    return mejor[2], Cobertura(evaluadas, total, len(posibles), len(candidatos),
+                               time.monotonic() - inicio)
+
+def estrategia_aproximada(motor: MotorFeedback, candidatos: ConjuntoCandidatos) -> int:
+    num_posibles = len(candidatos)
+
+    if num_posibles == motor.num_codigos and APERTURA_APROXIMADA in motor.codigos:
+        return motor.indice_de(APERTURA_APROXIMADA)
+
+    if num_posibles <= 2:
+        return candidatos.elemento(0)
+
+    if num_posibles <= 10:
+        return candidatos.elemento(random.randrange(num_posibles))
+
+    indices_a_evaluar = (
+        candidatos.muestrear(min(20, num_posibles)) if num_posibles <= 50
+        else random.sample(range(motor.num_codigos), 20)
+    )
+
+    mejor_indice = None
+    mejor_puntuacion = float('inf')
+
+    for indice in indices_a_evaluar:
+        muestra = np.array(candidatos.muestrear(min(50, num_posibles)))
+
+        resultados = np.bincount(motor.feedback_jugada(indice, muestra), minlength=motor.num_feedbacks)
+        max_conjunto_restante = resultados.max()
+
+        if max_conjunto_restante < mejor_puntuacion:
+            mejor_puntuacion = max_conjunto_restante
+            mejor_indice = int(indice)
+
+    if mejor_indice is None:
+        return candidatos.elemento(random.randrange(num_posibles))
+
+    return mejor_indice
+
+def _estrategia_optima(objetivo: str) -> Estrategia:
+    def estrategia(motor: MotorFeedback, candidatos: ConjuntoCandidatos,
+                   jugadas_previas: Optional[Sequence[int]] = None) -> int:
+        from busqueda_optima import jugada_optima
+        return jugada_optima(motor, candidatos, objetivo, jugadas_previas)
+
+    estrategia.admite_simetrias = True
+    return estrategia
+
+ESTRATEGIAS: Dict[str, Estrategia] = {
+    "knuth": _estrategia_exacta(_puntuar_knuth),
+    "tamano_esperado": _estrategia_exacta(_puntuar_tamano_esperado),
+    "entropia": _estrategia_exacta(_puntuar_entropia),
+    "mas_partes": _estrategia_exacta(_puntuar_mas_partes),
+    "aproximada": estrategia_aproximada,
+    "optimo": _estrategia_optima("peor_caso"),
+    "optimo_total": _estrategia_optima("total"),
+}
+
+ESTRATEGIAS_DETERMINISTAS = {"knuth", "tamano_esperado", "entropia", "mas_partes", "optimo", "optimo_total"}
+
+def elegir_jugada(estrategia: Estrategia, motor: MotorFeedback, candidatos: ConjuntoCandidatos,
+                  jugadas_previas: Sequence[int] = ()) -> int:
+    if getattr(estrategia, "admite_simetrias", False):
+        return estrategia(motor, candidatos, jugadas_previas)
+    return estrategia(motor, candidatos)
+
+def plazo_desde_presupuesto(presupuesto: Optional[float]) -> Optional[float]:
+    if presupuesto is None or math.isinf(presupuesto):
+        return None
+    return time.monotonic() + presupuesto
+
+def registrar_estrategia(nombre: str, estrategia: Estrategia) -> None:
+    ESTRATEGIAS[nombre] = estrategia
+
+def obtener_estrategia(estrategia: Union[str, Estrategia]) -> Estrategia:
+    if callable(estrategia):
+        return estrategia
+    try:
+        return ESTRATEGIAS[estrategia]
+    except KeyError:
+        raise ValueError(f"Estrategia '{estrategia}' no válida. Las estrategias válidas son: {', '.join(ESTRATEGIAS)}")
@@ -0,0 +1,101 @@
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+import numpy as np
+from conjunto_candidatos import ConjuntoCandidatos, mascara_desde_bits
+from estrategias import LIMITE_CANDIDATOS, TAMANO_LOTE, jugadas_a_evaluar
+from motor_feedback import MotorFeedback
+
+MAX_ERRORES = 1
+PROBABILIDAD_ERROR = 0.05
+
+def num_feedbacks_validos(num_posiciones: int) -> int:
+    return (num_posiciones + 1) * (num_posiciones + 2) // 2 - 1
+
+def tabla_masas(motor: MotorFeedback, soporte: np.ndarray, pesos: np.ndarray,
+                indices_jugadas: np.ndarray) -> np.ndarray:
+    masas = np.empty((len(indices_jugadas), motor.num_feedbacks), dtype=np.float64)
+    paso = max(1, TAMANO_LOTE // max(1, len(soporte)))
+    for inicio in range(0, len(indices_jugadas), paso):
+        jugadas = indices_jugadas[inicio:inicio + paso]
+        submatriz = motor.feedback_contra(jugadas, soporte)
+        desplazamientos = np.arange(len(jugadas))[:, None] * motor.num_feedbacks
+        masas[inicio:inicio + len(jugadas)] = np.bincount(
+            (submatriz + desplazamientos).ravel(), weights=np.tile(pesos, len(jugadas)),
+            minlength=len(jugadas) * motor.num_feedbacks
+        ).reshape(len(jugadas), motor.num_feedbacks)
+    return masas
+
+@dataclass
+class PesosRuidosos:
+    motor: MotorFeedback
+    max_errores: int = MAX_ERRORES
+    probabilidad_error: float = PROBABILIDAD_ERROR
+    pesos: np.ndarray = field(init=False)
+    errores: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        if self.max_errores < 0:
+            raise ValueError("max_errores no puede ser negativo")
+        if not 0.0 < self.probabilidad_error < 1.0:
+            raise ValueError("probabilidad_error debe estar entre 0 y 1")
+        alternativas = max(1, num_feedbacks_validos(self.motor.num_posiciones) - 1)
+        self._factor_acierto = 1.0 - self.probabilidad_error
+        self._factor_error = self.probabilidad_error / alternativas
+        self._todos = np.arange(self.motor.num_codigos, dtype=self.motor.tipo_indice)
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self.pesos = np.full(self.motor.num_codigos, 1.0 / self.motor.num_codigos)
+        self.errores = np.zeros(self.motor.num_codigos, dtype=np.uint8)
+
+    def copiar(self) -> "PesosRuidosos":
+        copia = PesosRuidosos.__new__(PesosRuidosos)
+        copia.__dict__.update(self.__dict__)
+        copia.pesos = self.pesos.copy()
+        copia.errores = self.errores.copy()
+        return copia
+
+    def actualizar(self, jugada: int, codigo: int) -> bool:
+        fallos = self.motor.feedback_jugada(jugada, self._todos) != codigo
+        errores = self.errores + fallos
+        admitidos = errores <= self.max_errores
+        if not admitidos.any():
+            return False
+
+        pesos = self.pesos * np.where(fallos, self._factor_error, self._factor_acierto)
+        pesos[~admitidos] = 0.0
+        total = pesos.sum()
+        if total <= 0.0:
+            return False
+        self.pesos = pesos / total
+        self.errores = np.minimum(errores, self.max_errores + 1).astype(np.uint8)
+        return True
+
+    def admitidos(self) -> ConjuntoCandidatos:
+        return ConjuntoCandidatos(mascara_desde_bits(self.pesos > 0.0), self.motor.num_codigos)
+
+    def mas_plausibles(self) -> ConjuntoCandidatos:
+        vivos = self.pesos > 0.0
+        minimo = self.errores[vivos].min()
+        return ConjuntoCandidatos(mascara_desde_bits(vivos & (self.errores == minimo)), self.motor.num_codigos)
+
+    def soporte(self, limite: int = LIMITE_CANDIDATOS) -> np.ndarray:
+        vivos = np.flatnonzero(self.pesos > 0.0)
+        if len(vivos) <= limite:
+            return vivos
+        return np.sort(vivos[np.argpartition(-self.pesos[vivos], limite - 1)[:limite]])
+
+    def elegir_jugada(self, jugadas_previas: Optional[Sequence[int]] = None) -> int:
+        soporte = self.soporte()
+        if len(soporte) == 1:
+            return int(soporte[0])
+
+        pesos = self.pesos[soporte] / self.pesos[soporte].sum()
+        candidatos = ConjuntoCandidatos.desde_indices(soporte, self.motor.num_codigos)
+        jugadas = jugadas_a_evaluar(self.motor, candidatos, jugadas_previas)
+        masas = tabla_masas(self.motor, soporte, pesos, jugadas)
+
+        ganador = self.motor.codificar(self.motor.num_posiciones, 0)
+        restante = np.round((masas ** 2).sum(axis=1) - masas[:, ganador] ** 2, 12)
+        orden = np.lexsort((jugadas, -self.pesos[jugadas], restante))
+        return int(jugadas[orden[0]])
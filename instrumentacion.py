@@ -0,0 +1,116 @@
+import json
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, TextIO, Union
+
+@dataclass
+class RegistroTurno:
+    partida: int
+    turno: int
+    candidatos_antes: int
+    jugada: Optional[int] = None
+    origen: str = "estrategia"
+    segundos_seleccion: float = 0.0
+    evaluaciones_seleccion: int = 0
+    candidatos_despues: Optional[int] = None
+    segundos_filtrado: float = 0.0
+    evaluaciones_filtrado: int = 0
+    cobertura: Optional[float] = None
+    consulta_cache: bool = False
+
+class Instrumentacion:
+
+    def __init__(self, traza: Optional[Union[str, TextIO]] = None, guardar_turnos: bool = True):
+        self.guardar_turnos = guardar_turnos
+        self.turnos: List[RegistroTurno] = []
+        self.partidas = 0
+        self._turno: Optional[RegistroTurno] = None
+        self._totales: Counter = Counter()
+        self._origenes: Counter = Counter()
+        self._bloqueo = threading.Lock()
+        self._propia = isinstance(traza, str)
+        self._traza: Optional[TextIO] = (
+            open(traza, "a", encoding="utf-8", buffering=1) if self._propia else traza
+        )
+
+    def iniciar_partida(self) -> None:
+        with self._bloqueo:
+            self.partidas += 1
+            self._turno = None
+
+    def registrar_seleccion(self, candidatos: int, jugada: Optional[int], origen: str,
+                            segundos: float, evaluaciones: int, cobertura: Optional[float] = None,
+                            consulta_cache: bool = False) -> None:
+        with self._bloqueo:
+            turno = self._turno.turno + 1 if self._turno is not None else 1
+            self._turno = RegistroTurno(self.partidas, turno, candidatos, jugada, origen,
+                                        segundos, evaluaciones, cobertura=cobertura,
+                                        consulta_cache=consulta_cache)
+            if self.guardar_turnos:
+                self.turnos.append(self._turno)
+            self._totales.update(turnos=1, segundos_seleccion=segundos,
+                                 evaluaciones_seleccion=evaluaciones)
+            self._origenes[origen] += 1
+            if consulta_cache:
+                self._totales["consultas_cache"] += 1
+            if cobertura is not None and cobertura < 1.0:
+                self._totales["selecciones_truncadas"] += 1
+            self._emitir("seleccion", self._turno)
+
+    def registrar_filtrado(self, candidatos: int, segundos: float, evaluaciones: int) -> None:
+        with self._bloqueo:
+            if self._turno is None:
+                self._turno = RegistroTurno(self.partidas, 1, candidatos)
+            self._turno.candidatos_despues = candidatos
+            self._turno.segundos_filtrado = segundos
+            self._turno.evaluaciones_filtrado = evaluaciones
+            self._totales.update(filtrados=1, segundos_filtrado=segundos,
+                                 evaluaciones_filtrado=evaluaciones)
+            self._emitir("filtrado", self._turno)
+
+    def _emitir(self, evento: str, turno: RegistroTurno) -> None:
+        if self._traza is not None:
+            self._traza.write(json.dumps({"evento": evento, **asdict(turno)}) + "\n")
+
+    def resumen(self) -> Dict[str, Any]:
+        with self._bloqueo:
+            turnos = self._totales["turnos"]
+            consultas_cache = self._totales["consultas_cache"]
+            return {
+                "partidas": self.partidas,
+                "turnos": turnos,
+                "filtrados": self._totales["filtrados"],
+                "segundos_seleccion": self._totales["segundos_seleccion"],
+                "segundos_filtrado": self._totales["segundos_filtrado"],
+                "evaluaciones_seleccion": self._totales["evaluaciones_seleccion"],
+                "evaluaciones_filtrado": self._totales["evaluaciones_filtrado"],
+                "selecciones_truncadas": self._totales["selecciones_truncadas"],
+                "turnos_por_origen": dict(self._origenes),
+                "consultas_cache": consultas_cache,
+                "aciertos_cache": self._origenes["cache"],
+                "tasa_aciertos_cache": self._origenes["cache"] / consultas_cache if consultas_cache else 0.0,
+                "segundos_por_turno": (self._totales["segundos_seleccion"] / turnos) if turnos else 0.0,
+            }
+
+    def cerrar(self) -> None:
+        if self._traza is not None:
+            self._traza.flush()
+            if self._propia:
+                self._traza.close()
+            self._traza = None
+
+def combinar_resumenes(resumenes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    totales: Counter = Counter()
+    origenes: Counter = Counter()
+    for resumen in resumenes:
+        totales.update({clave: valor for clave, valor in resumen.items()
+                        if isinstance(valor, (int, float)) and not clave.startswith(("tasa_", "segundos_por_"))})
+        origenes.update(resumen.get("turnos_por_origen", {}))
+    consultas_cache = totales["consultas_cache"]
+    return {
+        **dict(totales),
+        "turnos_por_origen": dict(origenes),
+        "tasa_aciertos_cache": origenes["cache"] / consultas_cache if consultas_cache else 0.0,
+        "segundos_por_turno": totales["segundos_seleccion"] / totales["turnos"] if totales["turnos"] else 0.0,
+    }
@@ -0,0 +1,104 @@
+import json
+import os
+import zlib
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+from conjunto_candidatos import ConjuntoCandidatos
+from motor_feedback import MotorFeedback, obtener_motor
+from estrategias import ESTRATEGIAS, Estrategia, elegir_jugada
+
+DIRECTORIO_LIBROS = os.environ.get(
+    "MASTERMIND_LIBROS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "libros")
+)
+PROFUNDIDAD_LIBRO = 3
+LIMITE_LIBRO = 1 << 16
+VERSION_LIBRO = 2
+
+Libro = Dict[Tuple[int, ...], int]
+
+def profundidad_libro(motor: MotorFeedback) -> int:
+    return PROFUNDIDAD_LIBRO if motor.tiene_matriz else 2
+
+def construir_libro(motor: MotorFeedback, estrategia: Estrategia,
+                    profundidad: Optional[int] = None) -> Libro:
+    if profundidad is None:
+        profundidad = profundidad_libro(motor)
+    libro: Libro = {}
+    ganador = motor.codificar(motor.num_posiciones, 0)
+
+    def expandir(prefijo: Tuple[int, ...], candidatos: ConjuntoCandidatos,
+                 jugadas_previas: Tuple[int, ...]) -> None:
+        jugada = elegir_jugada(estrategia, motor, candidatos, jugadas_previas)
+        libro[prefijo] = jugada
+
+        if len(prefijo) + 1 >= profundidad:
+            return
+
+        for codigo, parte in sorted(motor.particionar(candidatos, jugada).items()):
+            if codigo != ganador:
+                expandir(prefijo + (codigo,), parte, jugadas_previas + (jugada,))
+
+    expandir((), ConjuntoCandidatos.completo(motor.num_codigos), ())
+    return libro
+
+def ruta_libro(colores: Sequence[str], num_posiciones: int, estrategia: str) -> str:
+    huella = zlib.crc32(",".join(colores).encode("utf-8"))
+    nombre = f"{estrategia}_{num_posiciones}x{len(colores)}_{huella:08x}.json"
+    return os.path.join(DIRECTORIO_LIBROS, nombre)
+
+def guardar_libro(libro: Libro, ruta: str, colores: Sequence[str],
+                  num_posiciones: int, estrategia: str, metadatos: Optional[dict] = None) -> None:
+    datos = {
+        "version": VERSION_LIBRO,
+        "colores": list(colores),
+        "num_posiciones": num_posiciones,
+        "estrategia": estrategia,
+        "metadatos": metadatos or {},
+        "jugadas": {".".join(map(str, prefijo)): jugada for prefijo, jugada in libro.items()},
+    }
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w") as f:
+        json.dump(datos, f, separators=(",", ":"))
+    os.replace(temporal, ruta)
+
+def cargar_libro(ruta: str, colores: Sequence[str], num_posiciones: int,
+                 estrategia: str, metadatos: Optional[dict] = None) -> Optional[Libro]:
+    try:
+        with open(ruta) as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(datos, dict) or datos.get("version") != VERSION_LIBRO:
+        return None
+    if (datos.get("colores") != list(colores) or datos.get("num_posiciones") != num_posiciones
+            or datos.get("estrategia") != estrategia or datos.get("metadatos", {}) != (metadatos or {})):
+        return None
+
+    return {
+        tuple(int(codigo) for codigo in clave.split(".") if codigo): jugada
+        for clave, jugada in datos["jugadas"].items()
+    }
+
+@lru_cache(maxsize=64)
+def obtener_libro(colores: Tuple[str, ...], num_posiciones: int, estrategia: str) -> Libro:
+    ruta = ruta_libro(colores, num_posiciones, estrategia)
+    libro = cargar_libro(ruta, colores, num_posiciones, estrategia)
+    if libro is not None:
+        return libro
+
+    libro = construir_libro(obtener_motor(colores, num_posiciones), ESTRATEGIAS[estrategia])
+    try:
+        guardar_libro(libro, ruta, colores, num_posiciones, estrategia)
+    except OSError:
+        pass
+    return libro
+
+def consultar_libro(libro: Libro, historial: Sequence[Tuple[int, int]]) -> Optional[int]:
+    prefijo: Tuple[int, ...] = ()
+    for jugada, codigo in historial:
+        if libro.get(prefijo) != jugada:
+            return None
+        prefijo += (codigo,)
+    return libro.get(prefijo)
@@ -1,39 +1,169 @@
+import copy
 import itertools
 import random
-from operadores_logicos import *
+from functools import lru_cache
+import numpy as np
+from types import MappingProxyType
+from operadores_logicos import CNF, And, Not, Or, SentenceType, Symbol, at_least, dpll, exactly
+from cache_jugadas import CACHE_JUGADAS, CacheJugadas
+from conjunto_candidatos import ConjuntoCandidatos
+from feedback_ruidoso import PesosRuidosos
+from instrumentacion import Instrumentacion
+from motor_feedback import MotorFeedback, obtener_motor
+from estrategias import (ESTRATEGIAS_DETERMINISTAS, Cobertura, Estrategia, elegir_con_plazo, elegir_jugada,
+                         obtener_estrategia, plazo_desde_presupuesto)
+from libro_aperturas import LIMITE_LIBRO, consultar_libro, obtener_libro
 import time
 import sys
-from typing import List, Tuple, Set, Dict, Optional
+from typing import List, Tuple, Dict, Mapping, Optional, Sequence, Union
 from dataclasses import dataclass, field
 
 COLORES = ["azul", "rojo", "blanco", "negro", "verde", "purpura"]
 
+Combinacion = Tuple[str, ...]
+
+def _simbolo(pos: int, color: str) -> Symbol:
+    return Symbol(f"{color}_{pos}")
+
+@lru_cache(maxsize=32)
+def _restricciones_estructurales(colores: Tuple[str, ...], num_posiciones: int) -> Tuple[SentenceType, ...]:
+    restricciones = []
+    for pos in range(num_posiciones):
+        simbolos_posicion = [_simbolo(pos, color) for color in colores]
+        restricciones.append(Or(simbolos_posicion))
+        for simbolo1, simbolo2 in itertools.combinations(simbolos_posicion, 2):
+            restricciones.append(Or([Not(simbolo1), Not(simbolo2)]))
+    return tuple(restricciones)
+
+@lru_cache(maxsize=1 << 14)
+def _restricciones_feedback(combinacion: Combinacion, posiciones_correctas: int, 
+                            colores_correctos: int) -> Tuple[SentenceType, SentenceType]:
+    num_posiciones = len(combinacion)
+    negras = [_simbolo(pos, color) for pos, color in enumerate(combinacion)]
+    
+    indicadores = []
+    for color in dict.fromkeys(combinacion):
+        posiciones_color = [_simbolo(pos, color) for pos in range(num_posiciones)]
+        for cantidad in range(1, combinacion.count(color) + 1):
+            indicadores.append(at_least(cantidad, posiciones_color))
+    
+    return (exactly(posiciones_correctas, negras),
+            exactly(posiciones_correctas + colores_correctos, indicadores))
+
+@dataclass(frozen=True)
+class UniversoKB:
+    motor: MotorFeedback
+    simbolos: Mapping[Tuple[int, str], Symbol]
+    conocimiento: And
+    completo: ConjuntoCandidatos
+    cnf: CNF
+
+@lru_cache(maxsize=32)
+def obtener_universo(colores: Tuple[str, ...], num_posiciones: int) -> UniversoKB:
+    motor = obtener_motor(colores, num_posiciones)
+    simbolos = MappingProxyType({
+        (pos, color): _simbolo(pos, color) for pos in range(num_posiciones) for color in colores
+    })
+    conocimiento = And(_restricciones_estructurales(colores, num_posiciones))
+    cnf = CNF()
+    cnf.add(conocimiento)
+    return UniversoKB(motor, simbolos, conocimiento, ConjuntoCandidatos.completo(motor.num_codigos), cnf)
+
 @dataclass
 class MastermindKB:
-    todas_combinaciones: List[Tuple[str, str, str, str]] = field(default_factory=lambda: list(itertools.product(COLORES, repeat=4)))
-    combinaciones_posibles: Set[Tuple[str, str, str, str]] = field(init=False)
+    colores: Sequence[str] = field(default_factory=lambda: list(COLORES))
+    num_posiciones: int = 4
+    motor: Optional[MotorFeedback] = None
+    todas_combinaciones: Sequence[Combinacion] = field(init=False)
+    combinaciones_posibles: ConjuntoCandidatos = field(init=False)
     knowledge: And = field(default_factory=lambda: And([]))
-    symbols: Dict[Tuple[int, str], Symbol] = field(default_factory=dict)
+    symbols: Mapping[Tuple[int, str], Symbol] = field(default_factory=dict)
+    estrategia: Union[str, Estrategia] = "knuth"
+    usar_libro: bool = True
+    historial: List[Tuple[int, int]] = field(default_factory=list)
+    cache: Optional[CacheJugadas] = field(default_factory=lambda: CACHE_JUGADAS)
+    instrumentacion: Optional[Instrumentacion] = None
+    max_errores: int = 0
+    presupuesto: Optional[float] = None
     
     def __post_init__(self):
-        self.combinaciones_posibles = set(self.todas_combinaciones)
+        if self.motor is None:
+            self.motor = obtener_motor(tuple(self.colores), self.num_posiciones)
+        self._universo = obtener_universo(self.motor.colores, self.motor.num_posiciones)
+        self.colores = list(self.motor.colores)
+        self.num_posiciones = self.motor.num_posiciones
+        self.estrategia_fn = obtener_estrategia(self.estrategia)
+        if self.presupuesto is not None:
+            if self.presupuesto < 0:
+                raise ValueError("el presupuesto por jugada no puede ser negativo")
+            if not hasattr(self.estrategia_fn, "puntuar"):
+                raise ValueError(f"La estrategia '{self.estrategia}' no admite un presupuesto de tiempo")
+        self.cobertura: Optional[Cobertura] = None
+        self.consulta_cache = False
+        self.todas_combinaciones = self.motor.codigos
+        self.pesos = PesosRuidosos(self.motor, self.max_errores) if self.max_errores > 0 else None
+        
+        if not self.symbols:
+            self.symbols = self._universo.simbolos
+        if self.knowledge.conjuncts:
+            self._conocimiento_inicial = self.knowledge.conjoin(*self._universo.conocimiento.conjuncts)
+        else:
+            self._conocimiento_inicial = self._universo.conocimiento
         
-        for pos in range(4):
-            for color in COLORES:
-                self.symbols[(pos, color)] = Symbol(f"{color}_{pos}")
+        self._estado_inicial()
+    
+    def reiniciar(self) -> None:
+        self.historial = []
+        self._estado_inicial()
+    
+    def _estado_inicial(self) -> None:
+        self.combinaciones_posibles = self._universo.completo
+        self.knowledge = self._conocimiento_inicial
+        self._cnf: Optional[CNF] = None
+        self._restricciones_compiladas = 0
+        self._feedback_en_conocimiento = 0
+        if self.pesos is not None:
+            self.pesos.reiniciar()
+    
+    @property
+    def indices_posibles(self) -> np.ndarray:
+        return self.combinaciones_posibles.indices()
+    
+    def clonar(self) -> "MastermindKB":
+        clon = copy.copy(self)
+        clon.historial = list(self.historial)
+        clon._cnf = None
+        clon._restricciones_compiladas = 0
+        if self.pesos is not None:
+            clon.pesos = self.pesos.copiar()
+        return clon
     
-    def actualizar_con_feedback(self, combinacion: Tuple[str, str, str, str], 
+    def actualizar_con_feedback(self, combinacion: Combinacion, 
                               posiciones_correctas: int, 
                               colores_correctos: int) -> None:
-        if posiciones_correctas + colores_correctos > 4:
+        if self.instrumentacion is None:
+            return self._aplicar_feedback(combinacion, posiciones_correctas, colores_correctos)
+        
+        inicio, evaluaciones = time.perf_counter(), self.motor.evaluaciones
+        self._aplicar_feedback(combinacion, posiciones_correctas, colores_correctos)
+        self.instrumentacion.registrar_filtrado(
+            len(self.combinaciones_posibles), time.perf_counter() - inicio,
+            self.motor.evaluaciones - evaluaciones
+        )
+    
+    def _aplicar_feedback(self, combinacion: Combinacion, posiciones_correctas: int,
+                          colores_correctos: int) -> None:
+        if posiciones_correctas + colores_correctos > self.num_posiciones:
             print("\nADVERTENCIA: Feedback inválido. La suma de posiciones correctas y")
-            print("colores correctos no puede ser mayor que 4.")
+            print(f"colores correctos no puede ser mayor que {self.num_posiciones}.")
             return
         
-        nuevas_combinaciones = set()
-        for candidato in self.combinaciones_posibles:
-            if self._coincide_feedback(combinacion, candidato, posiciones_correctas, colores_correctos):
-                nuevas_combinaciones.add(candidato)
+        indice = self.motor.indice_de(combinacion)
+        codigo = self.motor.codificar(posiciones_correctas, colores_correctos)
+        if self.pesos is not None:
+            return self._aplicar_feedback_ruidoso(indice, codigo, posiciones_correctas, colores_correctos)
+        
+        nuevas_combinaciones = self.motor.filtrar(self.combinaciones_posibles, indice, codigo)
         
         if not nuevas_combinaciones and self.combinaciones_posibles:
             print("\nADVERTENCIA: No hay combinaciones que coincidan con el feedback proporcionado.")
@@ -43,128 +173,201 @@ class MastermindKB:
             return
         
         self.combinaciones_posibles = nuevas_combinaciones
+        self.historial.append((indice, codigo))
+    
+    def _aplicar_feedback_ruidoso(self, indice: int, codigo: int, posiciones_correctas: int,
+                                  colores_correctos: int) -> None:
+        exactas = self.motor.filtrar(self.combinaciones_posibles, indice, codigo)
+        if not self.pesos.actualizar(indice, codigo):
+            print("\nADVERTENCIA: Ninguna combinación es compatible con el feedback proporcionado")
+            print(f"admitiendo hasta {self.max_errores} respuestas erróneas. Se ignora este feedback.")
+            return
+        
+        if not exactas and self.combinaciones_posibles:
+            print("\nADVERTENCIA: El feedback contradice respuestas anteriores.")
+            print(f"Feedback recibido: {posiciones_correctas} posiciones correctas, {colores_correctos} colores correctos")
+            print("Se supone que alguna respuesta fue errónea y se continúa con las combinaciones más plausibles.")
         
-        self._agregar_restriccion_logica(combinacion, posiciones_correctas, colores_correctos)
+        self.combinaciones_posibles = self.pesos.mas_plausibles()
+        self.historial.append((indice, codigo))
         
-    def _coincide_feedback(self, combinacion1: Tuple[str, str, str, str], 
-                          combinacion2: Tuple[str, str, str, str], 
+    def _coincide_feedback(self, combinacion1: Combinacion, 
+                          combinacion2: Combinacion, 
                           posiciones_correctas: int, 
                           colores_correctos: int) -> bool:
-        counter1 = {color: 0 for color in COLORES}
-        counter2 = {color: 0 for color in COLORES}
-        
-        pos_correctas = 0
-        for i in range(4):
-            if combinacion1[i] == combinacion2[i]:
-                pos_correctas += 1
+        return self.motor.feedback(combinacion1, combinacion2) == (posiciones_correctas, colores_correctos)
+    
+    def _conocimiento_actualizado(self) -> And:
+        if self.pesos is None and self._feedback_en_conocimiento < len(self.historial):
+            self.knowledge = self.knowledge.conjoin(*(
+                restriccion
+                for indice, codigo in self.historial[self._feedback_en_conocimiento:]
+                for restriccion in _restricciones_feedback(self.todas_combinaciones[indice],
+                                                           *self.motor.decodificar(codigo))
+            ))
+            self._feedback_en_conocimiento = len(self.historial)
+        return self.knowledge
+    
+    def _cnf_actualizada(self) -> CNF:
+        if self._cnf is None:
+            if self._conocimiento_inicial is self._universo.conocimiento:
+                self._cnf = self._universo.cnf.copy()
+                self._restricciones_compiladas = len(self._universo.conocimiento.conjuncts)
             else:
-                counter1[combinacion1[i]] += 1
-                counter2[combinacion2[i]] += 1
-        
-        colores_comunes = sum(min(counter1[color], counter2[color]) for color in COLORES)
+                self._cnf = CNF()
+                self._restricciones_compiladas = 0
         
-        return pos_correctas == posiciones_correctas and colores_comunes == colores_correctos
+        conocimiento = self._conocimiento_actualizado()
+        for restriccion in conocimiento.conjuncts[self._restricciones_compiladas:]:
+            self._cnf.add(restriccion)
+        self._restricciones_compiladas = len(conocimiento.conjuncts)
+        return self._cnf
     
-    def _agregar_restriccion_logica(self, combinacion: Tuple[str, str, str, str], 
-                                  posiciones_correctas: int, 
-                                  colores_correctos: int) -> None:
-        pass
+    def implica(self, consulta) -> bool:
+        cnf = self._cnf_actualizada().copy()
+        literal = cnf.literal(consulta)
+        return dpll(cnf.clauses, cnf.num_variables, (-literal,)) is None
+    
+    def es_posible(self, consulta) -> bool:
+        cnf = self._cnf_actualizada().copy()
+        literal = cnf.literal(consulta)
+        return dpll(cnf.clauses, cnf.num_variables, (literal,)) is not None
+    
+    def color_en_posicion(self, pos: int, color: str) -> Optional[bool]:
+        simbolo = self.symbols[(pos, color)]
+        if self.implica(simbolo):
+            return True
+        if not self.es_posible(simbolo):
+            return False
+        return None
         
-    def siguiente_combinacion(self) -> Tuple[str, str, str, str]:
+    def siguiente_combinacion(self, plazo: Optional[float] = None) -> Combinacion:
+        if plazo is None:
+            plazo = plazo_desde_presupuesto(self.presupuesto)
+        if self.instrumentacion is None:
+            return self._seleccionar(plazo)[0]
+        
+        candidatos = len(self.combinaciones_posibles)
+        inicio, evaluaciones = time.perf_counter(), self.motor.evaluaciones
+        combinacion, origen = self._seleccionar(plazo)
+        self.instrumentacion.registrar_seleccion(
+            candidatos, self.motor.indice_de(combinacion), origen,
+            time.perf_counter() - inicio, self.motor.evaluaciones - evaluaciones,
+            self.cobertura.fraccion if self.cobertura is not None else None,
+            self.consulta_cache
+        )
+        return combinacion
+    
+    def _seleccionar(self, plazo: Optional[float] = None) -> Tuple[Combinacion, str]:
+        self.cobertura = None
+        self.consulta_cache = False
         if not self.combinaciones_posibles:
             print("\nADVERTENCIA: No hay combinaciones posibles restantes.")
             print("Esto puede deberse a un feedback inconsistente o a un error en el cálculo.")
             print("Reiniciando con una combinación aleatoria...\n")
             
-            return tuple(random.choice(COLORES) for _ in range(4))
-        
-        if len(self.combinaciones_posibles) == len(self.todas_combinaciones):
-            return ("azul", "azul", "rojo", "verde")
-        
-        if len(self.combinaciones_posibles) <= 2:
-            return next(iter(self.combinaciones_posibles))
-            
-        if len(self.combinaciones_posibles) <= 10:
-            return random.choice(list(self.combinaciones_posibles))
+            return generar_combinacion_aleatoria(self.colores, self.num_posiciones), "aleatoria"
         
-        combinaciones_a_evaluar = random.sample(
-            list(self.combinaciones_posibles) if len(self.combinaciones_posibles) <= 50 
-            else list(self.todas_combinaciones),
-            min(20, len(self.combinaciones_posibles))
-        )
+        if self.pesos is not None:
+            return self.todas_combinaciones[self.pesos.elegir_jugada([indice for indice, _ in self.historial])], "estrategia"
         
-        mejor_combinacion = None
-        mejor_puntuacion = float('inf')
-        
-        for combinacion in combinaciones_a_evaluar:
-            max_conjunto_restante = 0
-            
-            resultados = {}
-            
-            for candidato in random.sample(list(self.combinaciones_posibles), 
-                                          min(50, len(self.combinaciones_posibles))):
-                pos_correctas = 0
-                counter1 = {color: 0 for color in COLORES}
-                counter2 = {color: 0 for color in COLORES}
-                
-                for i in range(4):
-                    if combinacion[i] == candidato[i]:
-                        pos_correctas += 1
-                    else:
-                        counter1[combinacion[i]] += 1
-                        counter2[candidato[i]] += 1
-                
-                colores_comunes = sum(min(counter1[color], counter2[color]) for color in COLORES)
-                
-                feedback = (pos_correctas, colores_comunes)
-                if feedback not in resultados:
-                    resultados[feedback] = 0
-                resultados[feedback] += 1
-                
-                max_conjunto_restante = max(max_conjunto_restante, resultados[feedback])
-            
-            if max_conjunto_restante < mejor_puntuacion:
-                mejor_puntuacion = max_conjunto_restante
-                mejor_combinacion = combinacion
+        jugada, origen = self._buscar_jugada_conocida()
+        if jugada is None and self.presupuesto is not None:
+            jugada, self.cobertura = elegir_con_plazo(
+                self.motor, self.combinaciones_posibles, self.estrategia_fn.puntuar,
+                [indice for indice, _ in self.historial], plazo
+            )
+        elif jugada is None:
+            jugada = elegir_jugada(self.estrategia_fn, self.motor, self.combinaciones_posibles,
+                                   [indice for indice, _ in self.historial])
+            self._memorizar_jugada(jugada)
         
-        if mejor_combinacion is None:
-            return random.choice(list(self.combinaciones_posibles))
+        return self.todas_combinaciones[jugada], origen
+    
+    def _jugada_conocida(self) -> Optional[int]:
+        if self.pesos is not None:
+            return None
+        return self._buscar_jugada_conocida()[0]
+    
+    def _buscar_jugada_conocida(self) -> Tuple[Optional[int], str]:
+        jugada = self._consultar_libro()
+        if jugada is not None:
+            return jugada, "libro"
+        if self._usa_cache():
+            self.consulta_cache = True
+            jugada = self.cache.obtener(self._contexto_cache(), self.combinaciones_posibles)
+            if jugada is not None:
+                return jugada, "cache"
+        return None, "estrategia"
+    
+    def _memorizar_jugada(self, jugada: int) -> None:
+        if self._usa_cache() and self.presupuesto is None:
+            self.cache.guardar(self._contexto_cache(), self.combinaciones_posibles, jugada)
+    
+    def _usa_cache(self) -> bool:
+        return self.cache is not None and self.estrategia in ESTRATEGIAS_DETERMINISTAS
+    
+    def _contexto_cache(self) -> Tuple:
+        return (self.estrategia, self.motor.colores, self.motor.num_posiciones)
+    
+    def _usa_libro(self) -> bool:
+        return (self.usar_libro and self.estrategia in ESTRATEGIAS_DETERMINISTAS
+                and self.motor.num_codigos <= LIMITE_LIBRO)
+    
+    def _consultar_libro(self) -> Optional[int]:
+        if not self._usa_libro():
+            return None
         
-        return mejor_combinacion
+        libro = obtener_libro(self.motor.colores, self.motor.num_posiciones, self.estrategia)
+        return consultar_libro(libro, self.historial)
     
     def tamano_espacio_busqueda(self) -> int:
         return len(self.combinaciones_posibles)
 
 @dataclass
 class MastermindSolver:
-    kb: MastermindKB = field(default_factory=MastermindKB)
+    kb: Optional[MastermindKB] = None
     intentos: int = 0
     historia_espacio_busqueda: List[int] = field(default_factory=list)
+    estrategia: Union[str, Estrategia] = "knuth"
+    colores: Sequence[str] = field(default_factory=lambda: list(COLORES))
+    num_posiciones: int = 4
+    cache: Optional[CacheJugadas] = field(default_factory=lambda: CACHE_JUGADAS)
+    instrumentacion: Optional[Instrumentacion] = None
+    max_errores: int = 0
+    presupuesto: Optional[float] = None
     
-    def evaluar_combinacion(self, combinacion: Tuple[str, str, str, str], 
-                           combinacion_secreta: Tuple[str, str, str, str]) -> Tuple[int, int]:
-        counter1 = {color: 0 for color in COLORES}
-        counter2 = {color: 0 for color in COLORES}
-        
-        pos_correctas = 0
-        for i in range(4):
-            if combinacion[i] == combinacion_secreta[i]:
-                pos_correctas += 1
-            else:
-                counter1[combinacion[i]] += 1
-                counter2[combinacion_secreta[i]] += 1
-        
-        colores_comunes = sum(min(counter1[color], counter2[color]) for color in COLORES)
-        
-        return (pos_correctas, colores_comunes)
+    def __post_init__(self):
+        if self.kb is None:
+            self.kb = self._nueva_kb()
+    
+    def _kb_reiniciada(self) -> MastermindKB:
+        if self.kb is None:
+            return self._nueva_kb()
+        self.kb.reiniciar()
+        return self.kb
     
-    def modo_automatico(self, combinacion_secreta: Tuple[str, str, str, str]) -> Tuple[int, List[int]]:
-        self.kb = MastermindKB()
+    def _nueva_kb(self) -> MastermindKB:
+        return MastermindKB(colores=self.colores, num_posiciones=self.num_posiciones,
+                            estrategia=self.estrategia, cache=self.cache,
+                            instrumentacion=self.instrumentacion, max_errores=self.max_errores,
+                            presupuesto=self.presupuesto)
+    
+    def evaluar_combinacion(self, combinacion: Combinacion, 
+                           combinacion_secreta: Combinacion) -> Tuple[int, int]:
+        return self.kb.motor.feedback(combinacion, combinacion_secreta)
+    
+    def modo_automatico(self, combinacion_secreta: Combinacion) -> Tuple[int, List[int]]:
+        self.kb = self._kb_reiniciada()
+        if self.instrumentacion is not None:
+            self.instrumentacion.iniciar_partida()
         self.intentos = 0
         self.historia_espacio_busqueda = [self.kb.tamano_espacio_busqueda()]
         
         while True:
             self.intentos += 1
+            if self.intentos > self.kb.motor.num_codigos:
+                raise RuntimeError(f"La estrategia no encontró {combinacion_secreta} tras {self.kb.motor.num_codigos} intentos")
             
             combinacion = self.kb.siguiente_combinacion()
             
@@ -172,21 +375,85 @@ class MastermindSolver:
                 combinacion, combinacion_secreta
             )
             
-            if posiciones_correctas == 4:
+            if posiciones_correctas == self.num_posiciones:
                 return (self.intentos, self.historia_espacio_busqueda)
             
             self.kb.actualizar_con_feedback(combinacion, posiciones_correctas, colores_correctos)
             
             self.historia_espacio_busqueda.append(self.kb.tamano_espacio_busqueda())
     
+    def resolver_lote(self, secretos: Sequence[Union[Combinacion, int]]) -> Tuple[np.ndarray, List[List[int]]]:
+        kb = self._nueva_kb()
+        motor = kb.motor
+        if kb.pesos is not None:
+            resultados = [self.modo_automatico(motor.combinacion(int(secreto)) if isinstance(secreto, (int, np.integer))
+                                               else secreto) for secreto in secretos]
+            return (np.array([intentos for intentos, _ in resultados], dtype=np.int64),
+                    [list(historia) for _, historia in resultados])
+        indices = [int(secreto) if isinstance(secreto, (int, np.integer)) else motor.indice_de(secreto)
+                   for secreto in secretos]
+        if any(indice is None or not 0 <= indice < motor.num_codigos for indice in indices):
+            raise ValueError("hay secretos que no son combinaciones válidas")
+        indices = np.array(indices, dtype=motor.tipo_indice)
+        
+        num_juegos = len(indices)
+        intentos = np.zeros(num_juegos, dtype=np.int64)
+        historias = [[motor.num_codigos] for _ in range(num_juegos)]
+        ganador = motor.codificar(self.num_posiciones, 0)
+        
+        grupos = [(kb.combinaciones_posibles, [], np.arange(num_juegos))] if num_juegos else []
+        turno = 0
+        while grupos:
+            turno += 1
+            jugadas_grupo = []
+            for candidatos, historial, _ in grupos:
+                kb.combinaciones_posibles, kb.historial = candidatos, historial
+                jugadas_grupo.append(motor.indice_de(kb.siguiente_combinacion()))
+            
+            juegos = np.concatenate([miembros for _, _, miembros in grupos])
+            grupo_de_juego = np.repeat(np.arange(len(grupos)), [len(miembros) for _, _, miembros in grupos])
+            codigos = motor.feedback_pares(
+                np.array(jugadas_grupo, dtype=motor.tipo_indice)[grupo_de_juego], indices[juegos]
+            )
+            
+            resueltos = codigos == ganador
+            intentos[juegos[resueltos]] = turno
+            
+            claves, inversa = np.unique(
+                grupo_de_juego[~resueltos].astype(np.int64) * motor.num_feedbacks + codigos[~resueltos],
+                return_inverse=True
+            )
+            pendientes = juegos[~resueltos]
+            nuevos: Dict[ConjuntoCandidatos, Tuple[ConjuntoCandidatos, List[Tuple[int, int]], List[np.ndarray]]] = {}
+            for posicion, clave in enumerate(claves.tolist()):
+                indice_grupo, codigo = divmod(clave, motor.num_feedbacks)
+                candidatos, historial, _ = grupos[indice_grupo]
+                jugada = jugadas_grupo[indice_grupo]
+                parte = motor.filtrar(candidatos, jugada, codigo)
+                miembros = pendientes[inversa == posicion]
+                for juego in miembros.tolist():
+                    historias[juego].append(len(parte))
+                if parte in nuevos:
+                    nuevos[parte][2].append(miembros)
+                else:
+                    nuevos[parte] = (parte, historial + [(jugada, codigo)], [miembros])
+            
+            grupos = [(parte, historial, np.concatenate(miembros))
+                      for parte, historial, miembros in nuevos.values()]
+        
+        return intentos, historias
+    
     def modo_tiempo_real(self) -> int:
-        self.kb = MastermindKB()
+        self.kb = self._kb_reiniciada()
+        if self.instrumentacion is not None:
+            self.instrumentacion.iniciar_partida()
+        n = self.num_posiciones
         self.intentos = 0
         self.historia_espacio_busqueda = [self.kb.tamano_espacio_busqueda()]
         
         print("¡Bienvenido al solucionador de Mastermind!")
-        print("Piensa en una combinación secreta de 4 fichas con los siguientes colores:")
-        print(", ".join(COLORES))
+        print(f"Piensa en una combinación secreta de {n} fichas con los siguientes colores:")
+        print(", ".join(self.colores))
         print("Responderé con mis propuestas y tú me darás retroalimentación.")
         print()
         
@@ -200,23 +467,23 @@ class MastermindSolver:
             
             while True:
                 try:
-                    pos_correctas = int(input("Número de fichas en posición correcta (0-4): "))
-                    if 0 <= pos_correctas <= 4:
+                    pos_correctas = int(input(f"Número de fichas en posición correcta (0-{n}): "))
+                    if 0 <= pos_correctas <= n:
                         break
-                    print("Por favor, ingrese un valor entre 0 y 4.")
+                    print(f"Por favor, ingrese un valor entre 0 y {n}.")
                 except ValueError:
                     print("Por favor, ingrese un número válido.")
             
             while True:
                 try:
-                    colores_correctos = int(input("Número de fichas con color correcto pero en posición incorrecta (0-4): "))
-                    if 0 <= colores_correctos <= 4 and colores_correctos + pos_correctas <= 4:
+                    colores_correctos = int(input(f"Número de fichas con color correcto pero en posición incorrecta (0-{n}): "))
+                    if 0 <= colores_correctos <= n and colores_correctos + pos_correctas <= n:
                         break
-                    print("Por favor, ingrese un valor válido (la suma con posiciones correctas no debe exceder 4).")
+                    print(f"Por favor, ingrese un valor válido (la suma con posiciones correctas no debe exceder {n}).")
                 except ValueError:
                     print("Por favor, ingrese un número válido.")
             
-            if pos_correctas == 4:
+            if pos_correctas == n:
                 print(f"\n¡Se ha encontrado la solución en {self.intentos} intentos!")
                 return self.intentos
             
@@ -226,22 +493,24 @@ class MastermindSolver:
             self.historia_espacio_busqueda.append(nuevo_tamano)
             print(f"Espacio de búsqueda reducido a {nuevo_tamano} combinaciones posibles.")
 
-def generar_combinacion_aleatoria() -> Tuple[str, str, str, str]:
-    return tuple(random.choice(COLORES) for _ in range(4))
+def generar_combinacion_aleatoria(colores: Sequence[str] = COLORES, 
+                                  num_posiciones: int = 4) -> Combinacion:
+    return tuple(random.choice(colores) for _ in range(num_posiciones))
 
-def convertir_entrada_a_combinacion(entrada: str) -> Optional[Tuple[str, str, str, str]]:
+def convertir_entrada_a_combinacion(entrada: str, colores_validos: Sequence[str] = COLORES, 
+                                    num_posiciones: int = 4) -> Optional[Combinacion]:
     if ',' in entrada:
         colores = [color.strip().lower() for color in entrada.split(',')]
     else:
         colores = [color.strip().lower() for color in entrada.split()]
     
-    if len(colores) != 4:
-        print("¡Debes especificar exactamente 4 colores!")
+    if len(colores) != num_posiciones:
+        print(f"¡Debes especificar exactamente {num_posiciones} colores!")
         return None
     
     for color in colores:
-        if color not in COLORES:
-            print(f"Color '{color}' no válido. Los colores válidos son: {', '.join(COLORES)}")
+        if color not in colores_validos:
+            print(f"Color '{color}' no válido. Los colores válidos son: {', '.join(colores_validos)}")
             return None
     
     return tuple(colores)
@@ -264,7 +533,7 @@ def main():
         except ValueError:
             print("Por favor, ingrese un número válido.")
     
-    solver = MastermindSolver()
+    solver = MastermindSolver(max_errores=0 if modo == 1 else 1)
     
     if modo == 1:
         print("\n=== MODO AUTOMÁTICO ===")
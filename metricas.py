@@ -1,32 +1,43 @@
-import matplotlib.pyplot as plt
+import argparse
 import numpy as np
+import os
+import random
 import time
-from mastermind_solver import MastermindSolver, generar_combinacion_aleatoria
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from estrategias import ESTRATEGIAS_DETERMINISTAS
+from instrumentacion import Instrumentacion, combinar_resumenes
+from mastermind_solver import COLORES, MastermindSolver
+from resultados_continuos import (TAMANO_TROZO, AgregadoOnline, EscritorTrozos, cargar_estado,
+                                  descartar_trozos_huerfanos, guardar_estado)
 
-def ejecutar_experimento_200_juegos():
-    num_juegos = 200
-    solver = MastermindSolver()
+def _jugar_lote(lote: Tuple[int, int, str, Tuple[str, ...], int, bool, Optional[str]]
+                ) -> Tuple[List[Tuple[int, List[int]]], Optional[dict]]:
+    semilla, num_juegos, estrategia, colores, num_posiciones, instrumentar, traza = lote
+    random.seed(semilla)
+    rng = random.Random(semilla)
+    instrumentacion = Instrumentacion(traza, guardar_turnos=False) if instrumentar else None
+    solver = MastermindSolver(estrategia=estrategia, colores=colores, num_posiciones=num_posiciones,
+                              instrumentacion=instrumentacion)
     
-    intentos_por_juego = []
-    todas_historias = []
-    
-    print(f"Ejecutando {num_juegos} juegos automáticos...")
-    inicio_total = time.time()
-    
-    for i in range(num_juegos):
-        if i % 20 == 0:
-            print(f"Juego {i}/{num_juegos}")
-            
-        combinacion_secreta = generar_combinacion_aleatoria()
-        
-        intentos, historia = solver.modo_automatico(combinacion_secreta)
-        
-        intentos_por_juego.append(intentos)
-        todas_historias.append(historia)
-    
-    fin_total = time.time()
-    print(f"Experimento completado en {fin_total - inicio_total:.2f} segundos")
+    secretos = [tuple(rng.choice(colores) for _ in range(num_posiciones)) for _ in range(num_juegos)]
+    if instrumentacion is None and estrategia in ESTRATEGIAS_DETERMINISTAS:
+        intentos, historias = solver.resolver_lote(secretos)
+        return list(zip(intentos.tolist(), historias)), None
     
+    resultados = []
+    try:
+        for combinacion_secreta in secretos:
+            intentos, historia = solver.modo_automatico(combinacion_secreta)
+            resultados.append((intentos, list(historia)))
+    finally:
+        if instrumentacion is not None:
+            instrumentacion.cerrar()
+    return resultados, instrumentacion.resumen() if instrumentacion is not None else None
+
+def agregar_resultados(intentos_por_juego: List[int], todas_historias: List[List[int]]):
+    num_juegos = len(intentos_por_juego)
     promedio_intentos = np.mean(intentos_por_juego)
     
     max_intentos = max(len(historia) for historia in todas_historias)
@@ -48,12 +59,181 @@ def ejecutar_experimento_200_juegos():
         'promedio_intentos': promedio_intentos,
         'promedio_espacio_por_intento': promedio_espacio_por_intento,
         'intentos_por_juego': intentos_por_juego,
-        'max_intentos': max_intentos
+        'max_intentos': max_intentos,
+        'num_juegos': num_juegos,
     }
 
+def iterar_lotes(lotes: Iterable[tuple], num_procesos: int = 1) -> Iterator[Tuple[List[Tuple[int, List[int]]], Optional[dict]]]:
+    if num_procesos <= 1:
+        yield from map(_jugar_lote, lotes)
+        return
+    
+    with ProcessPoolExecutor(max_workers=num_procesos) as pool:
+        en_curso = deque()
+        for lote in lotes:
+            en_curso.append(pool.submit(_jugar_lote, lote))
+            if len(en_curso) >= 2 * num_procesos:
+                yield en_curso.popleft().result()
+        while en_curso:
+            yield en_curso.popleft().result()
+
+def iterar_juegos(num_juegos: int, semilla: int, tamano_lote: int = 50, num_procesos: int = 1,
+                  estrategia: str = "knuth", colores: Sequence[str] = COLORES, num_posiciones: int = 4,
+                  primer_lote: int = 0) -> Iterator[Tuple[int, List[int]]]:
+    for resultados_lote, _ in _iterar_lotes_experimento(num_juegos, semilla, tamano_lote, num_procesos,
+                                                        estrategia, colores, num_posiciones, primer_lote):
+        yield from resultados_lote
+
+def _iterar_lotes_experimento(num_juegos: int, semilla: int, tamano_lote: int, num_procesos: int,
+                              estrategia: str, colores: Sequence[str], num_posiciones: int,
+                              primer_lote: int = 0, instrumentar: bool = False,
+                              traza: Optional[str] = None):
+    num_lotes = (num_juegos + tamano_lote - 1) // tamano_lote
+    semillas = np.random.SeedSequence(semilla).generate_state(num_lotes)
+    lotes = (
+        (int(semillas[indice]), min(tamano_lote, num_juegos - indice * tamano_lote), estrategia,
+         tuple(colores), num_posiciones, instrumentar, traza)
+        for indice in range(primer_lote, num_lotes)
+    )
+    return iterar_lotes(lotes, num_procesos)
+
+def ejecutar_experimento(num_juegos: int = 200, num_procesos: Optional[int] = None, 
+                         tamano_lote: int = 50, semilla: Optional[int] = None, 
+                         estrategia: str = "knuth", colores: Sequence[str] = COLORES, 
+                         num_posiciones: int = 4, instrumentar: bool = False,
+                         traza: Optional[str] = None, directorio: Optional[str] = None,
+                         tamano_trozo: int = TAMANO_TROZO):
+    instrumentar = instrumentar or traza is not None
+    if num_procesos is None:
+        num_procesos = os.cpu_count() or 1
+    
+    parametros = {'num_juegos': num_juegos, 'tamano_lote': tamano_lote, 'estrategia': estrategia,
+                  'colores': list(colores), 'num_posiciones': num_posiciones}
+    agregado = AgregadoOnline()
+    resumen_total = None
+    lotes_completados = 0
+    escritor = None
+    
+    estado = cargar_estado(directorio) if directorio else None
+    if estado is not None:
+        if estado['parametros'] != parametros or (semilla is not None and semilla != estado['semilla']):
+            raise ValueError(f"El directorio '{directorio}' contiene un experimento con otros parámetros")
+        semilla = estado['semilla']
+        agregado = AgregadoOnline.desde_dict(estado['agregado'])
+        resumen_total = estado.get('instrumentacion')
+        lotes_completados = estado['lotes_completados']
+        print(f"Reanudando desde el juego {agregado.num_juegos}/{num_juegos}")
+    
+    if semilla is None:
+        semilla = random.SystemRandom().randrange(2 ** 32)
+    if directorio:
+        siguiente_trozo = estado['siguiente_trozo'] if estado is not None else 0
+        descartar_trozos_huerfanos(directorio, siguiente_trozo)
+        escritor = EscritorTrozos(directorio, tamano_trozo, siguiente_trozo)
+    
+    def guardar_punto_control() -> None:
+        escritor.volcar()
+        guardar_estado(directorio, {
+            'parametros': parametros, 'semilla': semilla, 'lotes_completados': lotes_completados,
+            'siguiente_trozo': escritor.siguiente_trozo, 'agregado': agregado.a_dict(),
+            'instrumentacion': resumen_total,
+        })
+    
+    print(f"Ejecutando {num_juegos} juegos automáticos en {num_procesos} procesos (semilla {semilla})...")
+    inicio_total = time.time()
+    
+    for resultados_lote, resumen in _iterar_lotes_experimento(
+            num_juegos, semilla, tamano_lote, num_procesos, estrategia, colores, num_posiciones,
+            lotes_completados, instrumentar, traza):
+        if resumen is not None:
+            resumen_total = resumen if resumen_total is None else combinar_resumenes([resumen_total, resumen])
+        for intentos, historia in resultados_lote:
+            agregado.agregar(intentos, historia)
+            if escritor is not None:
+                escritor.agregar(intentos, historia)
+        lotes_completados += 1
+        if escritor is not None and escritor.lleno():
+            guardar_punto_control()
+        print(f"Juego {agregado.num_juegos}/{num_juegos}")
+    
+    if escritor is not None:
+        guardar_punto_control()
+    
+    fin_total = time.time()
+    print(f"Experimento completado en {fin_total - inicio_total:.2f} segundos")
+    
+    resultados = agregado.resultados()
+    resultados['semilla'] = semilla
+    if instrumentar:
+        resultados['instrumentacion'] = resumen_total
+    return resultados
+
+def ejecutar_experimento_200_juegos(**kwargs):
+    return ejecutar_experimento(200, **kwargs)
+
+def evaluar_todos_los_secretos(estrategia: str = "knuth", colores: Sequence[str] = COLORES, 
+                               num_posiciones: int = 4):
+    kb_inicial = MastermindSolver(estrategia=estrategia, colores=colores, 
+                                  num_posiciones=num_posiciones).kb
+    motor = kb_inicial.motor
+    ganador = motor.codificar(motor.num_posiciones, 0)
+    
+    intentos_por_juego = []
+    todas_historias = []
+    espacio_por_profundidad = []
+    
+    def explorar(kb, historia: List[int]) -> None:
+        intentos = len(historia)
+        while len(espacio_por_profundidad) < intentos:
+            espacio_por_profundidad.append([])
+        espacio_por_profundidad[intentos - 1].append(kb.tamano_espacio_busqueda())
+        
+        combinacion = kb.siguiente_combinacion()
+        jugada = motor.indice_de(combinacion)
+        
+        for codigo, parte in sorted(motor.particionar(kb.combinaciones_posibles, jugada).items()):
+            if codigo == ganador:
+                intentos_por_juego.append(intentos)
+                todas_historias.append(historia)
+                continue
+            
+            hijo = kb.clonar()
+            hijo.actualizar_con_feedback(combinacion, *motor.decodificar(codigo))
+            explorar(hijo, historia + [len(parte)])
+    
+    print(f"Evaluando los {motor.num_codigos} secretos posibles con la estrategia '{estrategia}'...")
+    inicio_total = time.time()
+    explorar(kb_inicial, [kb_inicial.tamano_espacio_busqueda()])
+    fin_total = time.time()
+    print(f"Evaluación completada en {fin_total - inicio_total:.2f} segundos")
+    
+    resultados = agregar_resultados(intentos_por_juego, todas_historias)
+    resultados['histograma_intentos'] = dict(sorted(Counter(intentos_por_juego).items()))
+    resultados['peor_caso'] = max(intentos_por_juego)
+    resultados['espacio_por_profundidad'] = [
+        {'nodos': len(tamanos), 'promedio': float(np.mean(tamanos)), 'maximo': int(max(tamanos))}
+        for tamanos in espacio_por_profundidad
+    ]
+    return resultados
+
+def imprimir_evaluacion_exhaustiva(resultados) -> None:
+    print("\n=== EVALUACIÓN EXHAUSTIVA ===")
+    print(f"Promedio de intentos: {resultados['promedio_intentos']:.4f}")
+    print(f"Peor caso: {resultados['peor_caso']} intentos")
+    print("Histograma de intentos:")
+    for intentos, cantidad in resultados['histograma_intentos'].items():
+        print(f"  {intentos} intentos: {cantidad} secretos")
+    print("Espacio de búsqueda por profundidad:")
+    for profundidad, datos in enumerate(resultados['espacio_por_profundidad'], start=1):
+        print(f"  Intento {profundidad}: {datos['nodos']} estados, "
+              f"promedio {datos['promedio']:.1f}, máximo {datos['maximo']}")
+
 def generar_grafico_espacio_busqueda(resultados):
+    import matplotlib.pyplot as plt
+    
     promedio_intentos = resultados['promedio_intentos']
     promedio_espacio = resultados['promedio_espacio_por_intento']
+    num_juegos = resultados['num_juegos']
     
     intentos = np.arange(len(promedio_espacio))
     
@@ -85,10 +265,10 @@ def generar_grafico_espacio_busqueda(resultados):
     ax.legend(['Espacio de búsqueda'], loc='upper right')
 
     plt.tight_layout()
-    plt.savefig('espacio_busqueda_200_juegos.png', dpi=300)
-    print("Gráfico guardado: espacio_busqueda_200_juegos.png")
+    plt.savefig(f'espacio_busqueda_{num_juegos}_juegos.png', dpi=300)
+    print(f"Gráfico guardado: espacio_busqueda_{num_juegos}_juegos.png")
 
-    print("\n=== RESULTADOS DE 200 JUEGOS AUTOMÁTICOS ===")
+    print(f"\n=== RESULTADOS DE {num_juegos} JUEGOS AUTOMÁTICOS ===")
     print(f"Promedio de intentos necesarios: {promedio_intentos:.2f}")
     print(f"Tamaño inicial del espacio de búsqueda: {int(promedio_espacio[0])}")
 
@@ -99,22 +279,52 @@ def generar_grafico_espacio_busqueda(resultados):
     return fig
 
 def main():
+    parser = argparse.ArgumentParser(description="Experimentos de juegos automáticos de Mastermind")
+    parser.add_argument("--juegos", type=int, default=200)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--tamano-lote", type=int, default=50)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--estrategia", default="knuth")
+    parser.add_argument("--exhaustivo", action="store_true", 
+                        help="juega todos los secretos posibles recorriendo el árbol de juego una vez")
+    parser.add_argument("--instrumentar", action="store_true",
+                        help="mide tiempos y evaluaciones de feedback por turno")
+    parser.add_argument("--traza", metavar="RUTA", default=None,
+                        help="escribe un registro JSON por línea de cada turno (implica --instrumentar)")
+    parser.add_argument("--directorio", default=None,
+                        help="guarda los juegos en trozos .npz y reanuda el experimento si se interrumpió")
+    parser.add_argument("--tamano-trozo", type=int, default=TAMANO_TROZO)
+    args = parser.parse_args()
+    
+    if args.exhaustivo:
+        imprimir_evaluacion_exhaustiva(evaluar_todos_los_secretos(args.estrategia))
+        return
 
-    print("=== EXPERIMENTO DE 200 JUEGOS MASTERMIND ===")
+    print(f"=== EXPERIMENTO DE {args.juegos} JUEGOS MASTERMIND ===")
+    
+    resultados = ejecutar_experimento(args.juegos, num_procesos=args.procesos, 
+                                      tamano_lote=args.tamano_lote, semilla=args.semilla, 
+                                      estrategia=args.estrategia, instrumentar=args.instrumentar,
+                                      traza=args.traza, directorio=args.directorio,
+                                      tamano_trozo=args.tamano_trozo)
     
-    resultados = ejecutar_experimento_200_juegos()
+    if 'instrumentacion' in resultados:
+        print("\n=== INSTRUMENTACIÓN ===")
+        for clave, valor in resultados['instrumentacion'].items():
+            print(f"{clave}: {valor}")
     
     generar_grafico_espacio_busqueda(resultados)
     
     import json
-    with open('resultados_200_juegos.json', 'w') as f:
+    with open(f'resultados_{args.juegos}_juegos.json', 'w') as f:
         datos_json = {
             'promedio_intentos': float(resultados['promedio_intentos']),
             'promedio_espacio_por_intento': [float(x) for x in resultados['promedio_espacio_por_intento']],
+            'semilla': resultados['semilla'],
         }
         json.dump(datos_json, f)
     
-    print("Datos guardados en 'resultados_200_juegos.json'")
+    print(f"Datos guardados en 'resultados_{args.juegos}_juegos.json'")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,256 @@
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from conjunto_candidatos import ConjuntoCandidatos, mascara_desde_bits
+
+LIMITE_MATRIZ = 4096
+TAMANO_BLOQUE = 1 << 16
+
+class EspacioCodigos(Sequence):
+    def __init__(self, motor: "MotorFeedback"):
+        self.motor = motor
+
+    def __len__(self) -> int:
+        return self.motor.num_codigos
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self.motor.combinacion(i) for i in range(*indice.indices(len(self)))]
+        indice = int(indice)
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice de código fuera de rango")
+        return self.motor.combinacion(indice)
+
+    def __iter__(self) -> Iterator[Tuple[str, ...]]:
+        for inicio in range(0, len(self), TAMANO_BLOQUE):
+            indices = np.arange(inicio, min(inicio + TAMANO_BLOQUE, len(self)))
+            for fila in self.motor.digitos_de(indices).tolist():
+                yield tuple(self.motor.colores[digito] for digito in fila)
+
+    def __contains__(self, combinacion) -> bool:
+        return self.motor.indice_de(combinacion) is not None
+
+    def index(self, combinacion, *args) -> int:
+        indice = self.motor.indice_de(combinacion)
+        if indice is None:
+            raise ValueError(f"{combinacion} no es un código válido")
+        return indice
+
+class MotorFeedback:
+    def __init__(self, colores: Sequence[str], num_posiciones: int = 4):
+        self.colores = tuple(colores)
+        self.num_posiciones = num_posiciones
+        self.num_colores = len(self.colores)
+        self.num_feedbacks = (num_posiciones + 1) ** 2
+        self.tipo_feedback = np.uint8 if self.num_feedbacks <= 256 else np.uint16
+        self.num_codigos = self.num_colores ** num_posiciones
+        self.tiene_matriz = self.num_codigos <= LIMITE_MATRIZ
+
+        self.posicion_color: Dict[str, int] = {color: i for i, color in enumerate(self.colores)}
+        self.tipo_indice = np.int32 if self.num_codigos < 2 ** 31 else np.int64
+        self.potencias = (self.num_colores ** np.arange(num_posiciones - 1, -1, -1, dtype=np.int64)).astype(self.tipo_indice)
+        self.codigos = EspacioCodigos(self)
+
+        self._digitos: Optional[np.ndarray] = None
+        self._conteos: Optional[np.ndarray] = None
+        self._matriz: Optional[np.ndarray] = None
+        self._tabla: Optional[np.ndarray] = None
+        self._tabla_buscada = False
+        self._particiones: Dict[int, List[int]] = {}
+        self.evaluaciones = 0
+
+        if self.tiene_matriz:
+            self._digitos = self._calcular_digitos(np.arange(self.num_codigos))
+            self._conteos = self._calcular_conteos(self._digitos)
+
+    def _calcular_digitos(self, indices: np.ndarray) -> np.ndarray:
+        indices = np.asarray(indices, dtype=self.tipo_indice)
+        return ((indices[:, None] // self.potencias) % self.num_colores).astype(np.uint8)
+
+    def _calcular_conteos(self, digitos: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [(digitos == color).sum(axis=1) for color in range(self.num_colores)], axis=1
+        ).astype(np.uint8)
+
+    def digitos_de(self, indices: np.ndarray) -> np.ndarray:
+        if self._digitos is not None:
+            return self._digitos[indices]
+        return self._calcular_digitos(indices)
+
+    def conteos_de(self, indices: np.ndarray) -> np.ndarray:
+        if self._conteos is not None:
+            return self._conteos[indices]
+        return self._calcular_conteos(self._calcular_digitos(indices))
+
+    def combinacion(self, indice: int) -> Tuple[str, ...]:
+        digitos = []
+        for _ in range(self.num_posiciones):
+            indice, digito = divmod(indice, self.num_colores)
+            digitos.append(self.colores[digito])
+        return tuple(reversed(digitos))
+
+    def indice_de(self, combinacion: Sequence[str]) -> Optional[int]:
+        if len(combinacion) != self.num_posiciones:
+            return None
+        indice = 0
+        for color in combinacion:
+            digito = self.posicion_color.get(color)
+            if digito is None:
+                return None
+            indice = indice * self.num_colores + digito
+        return indice
+
+    @property
+    def matriz(self) -> np.ndarray:
+        if not self.tiene_matriz:
+            raise MemoryError(
+                f"La matriz de feedback de {self.num_codigos} códigos no se precalcula; "
+                "use feedback_contra()"
+            )
+        if self._matriz is None:
+            tabla = self.tabla
+            self._matriz = tabla if tabla is not None else self._calcular_matriz()
+        return self._matriz
+
+    @property
+    def tabla(self) -> Optional[np.ndarray]:
+        if not self._tabla_buscada:
+            from tablas_feedback import abrir_tabla
+            self._tabla = abrir_tabla(self)
+            self._tabla_buscada = True
+        return self._tabla
+
+    def _calcular_matriz(self, tamano_bloque: int = 256) -> np.ndarray:
+        matriz = np.empty((self.num_codigos, self.num_codigos), dtype=self.tipo_feedback)
+        todas = np.arange(self.num_codigos)
+        for inicio in range(0, self.num_codigos, tamano_bloque):
+            filas = np.arange(inicio, min(inicio + tamano_bloque, self.num_codigos))
+            matriz[filas] = self._calcular_feedback(filas, todas)
+        return matriz
+
+    def _calcular_feedback(self, filas: np.ndarray, columnas: np.ndarray) -> np.ndarray:
+        filas, columnas = np.asarray(filas), np.asarray(columnas)
+        traspuesta = len(filas) < len(columnas)
+        if traspuesta:
+            filas, columnas = columnas, filas
+
+        digitos = np.ascontiguousarray(self.digitos_de(filas).T)
+        conteos = np.ascontiguousarray(self.conteos_de(filas).T)
+        resultado = np.empty((len(columnas), len(filas)), dtype=self.tipo_feedback)
+        negras = np.empty(len(filas), dtype=self.tipo_feedback)
+        comunes = np.empty(len(filas), dtype=self.tipo_feedback)
+        for j, (digitos_columna, conteos_columna) in enumerate(
+                zip(self.digitos_de(columnas).tolist(), self.conteos_de(columnas).tolist())):
+            negras.fill(0)
+            for posicion, digito in enumerate(digitos_columna):
+                negras += digitos[posicion] == digito
+            comunes.fill(0)
+            for color, cuenta in enumerate(conteos_columna):
+                if cuenta:
+                    comunes += np.minimum(conteos[color], cuenta)
+            resultado[j] = negras * (self.num_posiciones + 1) + comunes - negras
+        return resultado if traspuesta else np.ascontiguousarray(resultado.T)
+
+    def feedback_contra(self, filas: np.ndarray, columnas: np.ndarray) -> np.ndarray:
+        self.evaluaciones += len(filas) * len(columnas)
+        if self.tiene_matriz:
+            return self.matriz[np.ix_(filas, columnas)]
+        if self.tabla is not None:
+            return self.tabla[np.ix_(filas, columnas)]
+        return self._calcular_feedback(filas, columnas)
+
+    def feedback_jugada(self, jugada: int, columnas: np.ndarray) -> np.ndarray:
+        self.evaluaciones += len(columnas)
+        if self.tiene_matriz:
+            return self.matriz[jugada, columnas]
+        if self.tabla is not None:
+            return self.tabla[jugada, columnas]
+
+        digitos_jugada = self._calcular_digitos(np.array([jugada]))[0]
+        digitos_columnas = self._calcular_digitos(columnas)
+        negras = (digitos_columnas == digitos_jugada).sum(axis=1, dtype=self.tipo_feedback)
+        comunes = np.zeros(len(columnas), dtype=self.tipo_feedback)
+        for color, cuenta in zip(*np.unique(digitos_jugada, return_counts=True)):
+            comunes += np.minimum((digitos_columnas == color).sum(axis=1, dtype=self.tipo_feedback),
+                                  cuenta).astype(self.tipo_feedback)
+        return self.codificar(negras, comunes - negras).astype(self.tipo_feedback)
+
+    def feedback_pares(self, jugadas: np.ndarray, secretos: np.ndarray) -> np.ndarray:
+        self.evaluaciones += len(jugadas)
+        if self.tiene_matriz:
+            return self.matriz[jugadas, secretos]
+        if self.tabla is not None:
+            return self.tabla[jugadas, secretos]
+
+        negras = (self.digitos_de(jugadas) == self.digitos_de(secretos)).sum(axis=1)
+        comunes = np.minimum(self.conteos_de(jugadas), self.conteos_de(secretos)).sum(axis=1)
+        return self.codificar(negras, comunes - negras).astype(self.tipo_feedback)
+
+    def mascaras_particion(self, jugada: int) -> List[int]:
+        mascaras = self._particiones.get(jugada)
+        if mascaras is None:
+            fila = self.matriz[jugada]
+            self.evaluaciones += self.num_codigos
+            mascaras = [mascara_desde_bits(fila == codigo) for codigo in range(self.num_feedbacks)]
+            self._particiones[jugada] = mascaras
+        return mascaras
+
+    def mascara_particion(self, jugada: int, codigo: int) -> int:
+        return self.mascaras_particion(jugada)[codigo]
+
+    def filtrar(self, candidatos: ConjuntoCandidatos, jugada: int, codigo: int) -> ConjuntoCandidatos:
+        if self.tiene_matriz:
+            return candidatos & self.mascara_particion(jugada, codigo)
+        return self._particionar_por_bloques(candidatos, jugada, codigo).get(
+            codigo, ConjuntoCandidatos(0, self.num_codigos, 0)
+        )
+
+    def particionar(self, candidatos: ConjuntoCandidatos, jugada: int) -> Dict[int, ConjuntoCandidatos]:
+        if self.tiene_matriz:
+            particiones = {}
+            for codigo, mascara in enumerate(self.mascaras_particion(jugada)):
+                parte = candidatos & mascara
+                if parte:
+                    particiones[codigo] = parte
+            return particiones
+        return self._particionar_por_bloques(candidatos, jugada)
+
+    def _particionar_por_bloques(self, candidatos: ConjuntoCandidatos, jugada: int,
+                                 solo_codigo: Optional[int] = None) -> Dict[int, ConjuntoCandidatos]:
+        bytes_por_bloque = TAMANO_BLOQUE // 8
+        bytes_totales = (self.num_codigos + 7) // 8
+        partes: Dict[int, bytearray] = {}
+
+        for inicio, indices in candidatos.bloques(TAMANO_BLOQUE):
+            fila = self.feedback_jugada(jugada, indices)
+            codigos = [solo_codigo] if solo_codigo is not None else np.unique(fila)
+            for codigo in codigos:
+                seleccion = indices[fila == codigo] - inicio
+                if not len(seleccion):
+                    continue
+                bits = np.zeros(min(TAMANO_BLOQUE, self.num_codigos - inicio), dtype=bool)
+                bits[seleccion] = True
+                destino = partes.setdefault(int(codigo), bytearray(bytes_totales))
+                inicio_byte = inicio // 8
+                destino[inicio_byte:inicio_byte + bytes_por_bloque] = np.packbits(bits, bitorder="little").tobytes()
+
+        return {
+            codigo: ConjuntoCandidatos(int.from_bytes(datos, "little"), self.num_codigos)
+            for codigo, datos in partes.items()
+        }
+
+    def codificar(self, posiciones_correctas, colores_correctos):
+        return posiciones_correctas * (self.num_posiciones + 1) + colores_correctos
+
+    def decodificar(self, codigo: int) -> Tuple[int, int]:
+        return divmod(int(codigo), self.num_posiciones + 1)
+
+    def feedback(self, combinacion1: Sequence[str], combinacion2: Sequence[str]) -> Tuple[int, int]:
+        indice1, indice2 = self.indice_de(combinacion1), self.indice_de(combinacion2)
+        return self.decodificar(self.feedback_jugada(indice1, np.array([indice2]))[0])
+
+@lru_cache(maxsize=32)
+def obtener_motor(colores: Tuple[str, ...], num_posiciones: int = 4) -> MotorFeedback:
+    return MotorFeedback(colores, num_posiciones)
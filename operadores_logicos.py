@@ -1,123 +1,337 @@
-from dataclasses import dataclass
-from typing import List, Set, Dict, Any
+import weakref
+from itertools import combinations
+from functools import lru_cache
+from typing import Callable, FrozenSet, Iterable, List, Dict, Any, Optional, Tuple
 SentenceType = Any
+Evaluator = Callable[[int], bool]
 
-@dataclass
-class Symbol:
-    name: str
+class Sentence:
+    __slots__ = ("_symbols", "__weakref__")
+    _interned: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+    
+    def __new__(cls, *args):
+        key = (cls,) + cls._key(*args)
+        node = Sentence._interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            node._initialize(*key[1:])
+            object.__setattr__(node, "_symbols", None)
+            Sentence._interned[key] = node
+        return node
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def __reduce__(self):
+        return (type(self), self._arguments())
+    
+    def children(self) -> Tuple[SentenceType, ...]:
+        return ()
+    
+    def symbols(self) -> FrozenSet[str]:
+        if self._symbols is None:
+            children = self.children()
+            symbols = frozenset().union(*[child.symbols() for child in children]) if children else frozenset()
+            object.__setattr__(self, "_symbols", symbols)
+        return self._symbols
+    
+    def evaluate(self, model: Dict[str, bool], memo: Optional[Dict[SentenceType, bool]] = None) -> bool:
+        if memo is None:
+            return self._evaluate(model, None)
+        result = memo.get(self)
+        if result is None:
+            result = self._evaluate(model, memo)
+            memo[self] = result
+        return result
+    
+    def compile(self, slots: Dict[str, int], cache: Optional[Dict[SentenceType, Evaluator]] = None) -> Evaluator:
+        if cache is None:
+            cache = {}
+        evaluator = cache.get(self)
+        if evaluator is None:
+            evaluator = self._compile(slots, cache)
+            cache[self] = evaluator
+        return evaluator
+    
+    def truth_table(self, slots: Dict[str, int], num_symbols: int, 
+                    cache: Optional[Dict[SentenceType, int]] = None) -> int:
+        if cache is None:
+            cache = {}
+        table = cache.get(self)
+        if table is None:
+            table = self._truth_table(slots, num_symbols, cache)
+            cache[self] = table
+        return table
+
+class Symbol(Sentence):
+    __slots__ = ("name",)
+    
+    @staticmethod
+    def _key(name: str):
+        return (name,)
+    
+    def _initialize(self, name: str) -> None:
+        object.__setattr__(self, "name", name)
+    
+    def _arguments(self):
+        return (self.name,)
     
     def __repr__(self):
         return self.name
     
-    def evaluate(self, model: Dict[str, bool]) -> bool:
+    def evaluate(self, model: Dict[str, bool], memo: Optional[Dict[SentenceType, bool]] = None) -> bool:
         try:
             return bool(model[self.name])
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
     
-    def symbols(self) -> Set[str]:
-        return {self.name}
+    def symbols(self) -> FrozenSet[str]:
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset([self.name]))
+        return self._symbols
+    
+    def _compile(self, slots: Dict[str, int], cache) -> Evaluator:
+        try:
+            slot = slots[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+        return lambda model: (model >> slot) & 1 == 1
+    
+    def _truth_table(self, slots: Dict[str, int], num_symbols: int, cache) -> int:
+        try:
+            return _symbol_truth_table(slots[self.name], num_symbols)
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
-@dataclass
-class Not:
-    operand: SentenceType
+class Not(Sentence):
+    __slots__ = ("operand",)
+    
+    @staticmethod
+    def _key(operand: SentenceType):
+        return (operand,)
+    
+    def _initialize(self, operand: SentenceType) -> None:
+        object.__setattr__(self, "operand", operand)
+    
+    def _arguments(self):
+        return (self.operand,)
+    
+    def children(self) -> Tuple[SentenceType, ...]:
+        return (self.operand,)
     
     def __repr__(self):
         return f"Not({self.operand})"
     
-    def evaluate(self, model: Dict[str, bool]) -> bool:
-        return not self.operand.evaluate(model)
+    def _evaluate(self, model: Dict[str, bool], memo) -> bool:
+        return not self.operand.evaluate(model, memo)
+    
+    def _compile(self, slots: Dict[str, int], cache) -> Evaluator:
+        operand = self.operand.compile(slots, cache)
+        return lambda model: not operand(model)
     
-    def symbols(self) -> Set[str]:
-        return self.operand.symbols()
+    def _truth_table(self, slots: Dict[str, int], num_symbols: int, cache) -> int:
+        return ~self.operand.truth_table(slots, num_symbols, cache) & _all_models(num_symbols)
 
-@dataclass
-class And:
-    conjuncts: List[SentenceType]
+class And(Sentence):
+    __slots__ = ("conjuncts",)
+    
+    @staticmethod
+    def _key(conjuncts: Iterable[SentenceType] = ()):
+        return (tuple(conjuncts),)
+    
+    def _initialize(self, conjuncts: Tuple[SentenceType, ...]) -> None:
+        object.__setattr__(self, "conjuncts", conjuncts)
+    
+    def _arguments(self):
+        return (self.conjuncts,)
+    
+    def children(self) -> Tuple[SentenceType, ...]:
+        return self.conjuncts
     
     def __repr__(self):
         conjunctions = ", ".join([str(conjunct) for conjunct in self.conjuncts])
         return f"And({conjunctions})"
     
-    def add(self, conjunct: SentenceType) -> None:
-        self.conjuncts.append(conjunct)
+    def conjoin(self, *conjuncts: SentenceType) -> "And":
+        return And(self.conjuncts + conjuncts)
+    
+    def _evaluate(self, model: Dict[str, bool], memo) -> bool:
+        return all(conjunct.evaluate(model, memo) for conjunct in self.conjuncts)
     
-    def evaluate(self, model: Dict[str, bool]) -> bool:
-        return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
+    def _compile(self, slots: Dict[str, int], cache) -> Evaluator:
+        conjuncts = [conjunct.compile(slots, cache) for conjunct in self.conjuncts]
+        if len(conjuncts) == 2:
+            first, second = conjuncts
+            return lambda model: first(model) and second(model)
+        return lambda model: all(conjunct(model) for conjunct in conjuncts)
     
-    def symbols(self) -> Set[str]:
-        if not self.conjuncts:
-            return set()
-        return set().union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def _truth_table(self, slots: Dict[str, int], num_symbols: int, cache) -> int:
+        table = _all_models(num_symbols)
+        for conjunct in self.conjuncts:
+            table &= conjunct.truth_table(slots, num_symbols, cache)
+            if not table:
+                break
+        return table
 
-@dataclass
-class Or:
-    disjuncts: List[SentenceType]
+class Or(Sentence):
+    __slots__ = ("disjuncts",)
+    
+    @staticmethod
+    def _key(disjuncts: Iterable[SentenceType] = ()):
+        return (tuple(disjuncts),)
+    
+    def _initialize(self, disjuncts: Tuple[SentenceType, ...]) -> None:
+        object.__setattr__(self, "disjuncts", disjuncts)
+    
+    def _arguments(self):
+        return (self.disjuncts,)
+    
+    def children(self) -> Tuple[SentenceType, ...]:
+        return self.disjuncts
     
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
     
-    def evaluate(self, model: Dict[str, bool]) -> bool:
-        return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
+    def _evaluate(self, model: Dict[str, bool], memo) -> bool:
+        return any(disjunct.evaluate(model, memo) for disjunct in self.disjuncts)
+    
+    def _compile(self, slots: Dict[str, int], cache) -> Evaluator:
+        disjuncts = [disjunct.compile(slots, cache) for disjunct in self.disjuncts]
+        if len(disjuncts) == 2:
+            first, second = disjuncts
+            return lambda model: first(model) or second(model)
+        return lambda model: any(disjunct(model) for disjunct in disjuncts)
     
-    def symbols(self) -> Set[str]:
-        if not self.disjuncts:
-            return set()
-        return set().union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def _truth_table(self, slots: Dict[str, int], num_symbols: int, cache) -> int:
+        table = 0
+        for disjunct in self.disjuncts:
+            table |= disjunct.truth_table(slots, num_symbols, cache)
+        return table
 
-@dataclass
-class Implication:
-    antecedent: SentenceType
-    consequent: SentenceType
+class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+    
+    @staticmethod
+    def _key(antecedent: SentenceType, consequent: SentenceType):
+        return (antecedent, consequent)
+    
+    def _initialize(self, antecedent: SentenceType, consequent: SentenceType) -> None:
+        object.__setattr__(self, "antecedent", antecedent)
+        object.__setattr__(self, "consequent", consequent)
+    
+    def _arguments(self):
+        return (self.antecedent, self.consequent)
+    
+    def children(self) -> Tuple[SentenceType, ...]:
+        return (self.antecedent, self.consequent)
     
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
     
-    def evaluate(self, model: Dict[str, bool]) -> bool:
-        return not self.antecedent.evaluate(model) or self.consequent.evaluate(model)
+    def _evaluate(self, model: Dict[str, bool], memo) -> bool:
+        return not self.antecedent.evaluate(model, memo) or self.consequent.evaluate(model, memo)
+    
+    def _compile(self, slots: Dict[str, int], cache) -> Evaluator:
+        antecedent, consequent = self.antecedent.compile(slots, cache), self.consequent.compile(slots, cache)
+        return lambda model: not antecedent(model) or consequent(model)
     
-    def symbols(self) -> Set[str]:
-        return self.antecedent.symbols().union(self.consequent.symbols())
+    def _truth_table(self, slots: Dict[str, int], num_symbols: int, cache) -> int:
+        antecedent = self.antecedent.truth_table(slots, num_symbols, cache)
+        consequent = self.consequent.truth_table(slots, num_symbols, cache)
+        return (~antecedent | consequent) & _all_models(num_symbols)
 
-@dataclass
-class Biconditional:
-    left: SentenceType
-    right: SentenceType
+class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+    
+    @staticmethod
+    def _key(left: SentenceType, right: SentenceType):
+        return (left, right)
+    
+    def _initialize(self, left: SentenceType, right: SentenceType) -> None:
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "right", right)
+    
+    def _arguments(self):
+        return (self.left, self.right)
+    
+    def children(self) -> Tuple[SentenceType, ...]:
+        return (self.left, self.right)
     
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
     
-    def evaluate(self, model: Dict[str, bool]) -> bool:
-        return self.left.evaluate(model) == self.right.evaluate(model)
+    def _evaluate(self, model: Dict[str, bool], memo) -> bool:
+        return self.left.evaluate(model, memo) == self.right.evaluate(model, memo)
+    
+    def _compile(self, slots: Dict[str, int], cache) -> Evaluator:
+        left, right = self.left.compile(slots, cache), self.right.compile(slots, cache)
+        return lambda model: left(model) == right(model)
     
-    def symbols(self) -> Set[str]:
-        return self.left.symbols().union(self.right.symbols())
+    def _truth_table(self, slots: Dict[str, int], num_symbols: int, cache) -> int:
+        left = self.left.truth_table(slots, num_symbols, cache)
+        right = self.right.truth_table(slots, num_symbols, cache)
+        return ~(left ^ right) & _all_models(num_symbols)
 
-def model_check(knowledge: SentenceType, query: SentenceType) -> bool:
+class CompiledSentence:
 
-    def check_all(knowledge: SentenceType, query: SentenceType, symbols: Set[str], model: Dict[str, bool]) -> bool:
+    def __init__(self, sentence: SentenceType, symbols: Optional[List[str]] = None):
+        self.symbols: Tuple[str, ...] = tuple(sorted(sentence.symbols()) if symbols is None else symbols)
+        self.slots: Dict[str, int] = {name: slot for slot, name in enumerate(self.symbols)}
+        self.sentence = sentence
+        self._evaluator = sentence.compile(self.slots, {})
 
-        if not symbols:
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    def model_index(self, model) -> int:
+        if isinstance(model, int):
+            return model
+        if isinstance(model, dict):
+            values = [model[name] for name in self.symbols]
         else:
-            remaining = symbols.copy()
-            p = remaining.pop()
+            values = model
+        return sum(1 << slot for slot, value in enumerate(values) if value)
+
+    def evaluate(self, model) -> bool:
+        return bool(self._evaluator(self.model_index(model)))
+
+    def evaluate_many(self, models) -> List[bool]:
+        evaluator = self._evaluator
+        return [bool(evaluator(self.model_index(model))) for model in models]
+
+    def truth_table(self) -> int:
+        return self.sentence.truth_table(self.slots, len(self.symbols), {})
+
+def compile_sentence(sentence: SentenceType, symbols: Optional[List[str]] = None) -> CompiledSentence:
+    return CompiledSentence(sentence, symbols)
 
-            model_true = model.copy()
-            model_true[p] = True
+TRUTH_TABLE_LIMIT = 26
 
-            model_false = model.copy()
-            model_false[p] = False
+@lru_cache(maxsize=None)
+def _all_models(num_symbols: int) -> int:
+    return (1 << (1 << num_symbols)) - 1
 
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+@lru_cache(maxsize=None)
+def _symbol_truth_table(slot: int, num_symbols: int) -> int:
+    table = ((1 << (1 << slot)) - 1) << (1 << slot)
+    length = 1 << (slot + 1)
+    while length < (1 << num_symbols):
+        table |= table << length
+        length <<= 1
+    return table
 
-    symbols = knowledge.symbols().union(query.symbols())
+def model_check(knowledge: SentenceType, query: SentenceType) -> bool:
+    symbols = sorted(knowledge.symbols().union(query.symbols()))
+
+    if len(symbols) <= TRUTH_TABLE_LIMIT:
+        slots = {name: slot for slot, name in enumerate(symbols)}
+        cache: Dict[SentenceType, int] = {}
+        knowledge_table = knowledge.truth_table(slots, len(symbols), cache)
+        query_table = query.truth_table(slots, len(symbols), cache)
+        return knowledge_table & ~query_table == 0
 
-    return check_all(knowledge, query, symbols, dict())
+    compiled_knowledge = compile_sentence(knowledge, symbols)._evaluator
+    compiled_query = compile_sentence(query, symbols)._evaluator
+    return all(compiled_query(model) for model in range(1 << len(symbols))
+               if compiled_knowledge(model))
 
 def create_symbol(name: str) -> Symbol:
     return Symbol(name)
@@ -126,13 +340,216 @@ def create_not(operand: SentenceType) -> Not:
     return Not(operand)
 
 def create_and(*conjuncts: SentenceType) -> And:
-    return And(list(conjuncts))
+    return And(conjuncts)
 
 def create_or(*disjuncts: SentenceType) -> Or:
-    return Or(list(disjuncts))
+    return Or(disjuncts)
 
 def create_implication(antecedent: SentenceType, consequent: SentenceType) -> Implication:
     return Implication(antecedent, consequent)
 
 def create_biconditional(left: SentenceType, right: SentenceType) -> Biconditional:
-    return Biconditional(left, right)
\ No newline at end of file
+    return Biconditional(left, right)
+
+def exactly(k: int, operands: List[SentenceType]) -> SentenceType:
+    if k < 0 or k > len(operands):
+        return Or([])
+    terms = []
+    for chosen in combinations(range(len(operands)), k):
+        chosen_set = set(chosen)
+        terms.append(And([operand if i in chosen_set else Not(operand)
+                          for i, operand in enumerate(operands)]))
+    return terms[0] if len(terms) == 1 else Or(terms)
+
+def at_least(k: int, operands: List[SentenceType]) -> SentenceType:
+    if k <= 0:
+        return And([])
+    if k > len(operands):
+        return Or([])
+    terms = [And([operands[i] for i in chosen]) for chosen in combinations(range(len(operands)), k)]
+    return terms[0] if len(terms) == 1 else Or(terms)
+
+class CNF:
+
+    def __init__(self):
+        self.variables: Dict[str, int] = {}
+        self.clauses: List[Tuple[int, ...]] = []
+        self.num_variables = 0
+        self._literals: Dict[SentenceType, int] = {}
+
+    def copy(self) -> "CNF":
+        other = CNF()
+        other.variables = dict(self.variables)
+        other.clauses = list(self.clauses)
+        other.num_variables = self.num_variables
+        other._literals = dict(self._literals)
+        return other
+
+    def variable(self, name: str) -> int:
+        if name not in self.variables:
+            self.num_variables += 1
+            self.variables[name] = self.num_variables
+        return self.variables[name]
+
+    def _auxiliary(self) -> int:
+        self.num_variables += 1
+        return self.num_variables
+
+    def add(self, sentence: SentenceType) -> None:
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or) and all(self._is_literal(d) for d in sentence.disjuncts):
+            self.clauses.append(tuple(self.literal(d) for d in sentence.disjuncts))
+        else:
+            self.clauses.append((self.literal(sentence),))
+
+    def _is_literal(self, sentence: SentenceType) -> bool:
+        return isinstance(sentence, Symbol) or (isinstance(sentence, Not) and isinstance(sentence.operand, Symbol))
+
+    def literal(self, sentence: SentenceType) -> int:
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        cached = self._literals.get(sentence)
+        if cached is not None:
+            return cached
+
+        if isinstance(sentence, Implication):
+            result = self.literal(Or([Not(sentence.antecedent), sentence.consequent]))
+        elif isinstance(sentence, Biconditional):
+            left, right = self.literal(sentence.left), self.literal(sentence.right)
+            result = self._auxiliary()
+            self.clauses.extend([(-result, -left, right), (-result, left, -right),
+                                 (result, left, right), (result, -left, -right)])
+        elif isinstance(sentence, And):
+            operands = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            result = self._auxiliary()
+            self.clauses.extend((-result, operand) for operand in operands)
+            self.clauses.append((result,) + tuple(-operand for operand in operands))
+        elif isinstance(sentence, Or):
+            operands = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            result = self._auxiliary()
+            self.clauses.extend((result, -operand) for operand in operands)
+            self.clauses.append((-result,) + tuple(operands))
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+
+        self._literals[sentence] = result
+        return result
+
+def dpll(clauses: List[Tuple[int, ...]], num_variables: int,
+         assumptions: Tuple[int, ...] = ()) -> Optional[Dict[int, bool]]:
+    value = [0] * (num_variables + 1)
+    watches: Dict[int, List[int]] = {}
+    watched = []
+    trail: List[int] = []
+    pending: List[int] = []
+
+    def assign(literal: int) -> bool:
+        current = value[abs(literal)]
+        if current:
+            return (current > 0) == (literal > 0)
+        value[abs(literal)] = 1 if literal > 0 else -1
+        trail.append(literal)
+        pending.append(literal)
+        return True
+
+    def is_true(literal: int) -> bool:
+        current = value[abs(literal)]
+        return current != 0 and (current > 0) == (literal > 0)
+
+    def is_false(literal: int) -> bool:
+        current = value[abs(literal)]
+        return current != 0 and (current > 0) != (literal > 0)
+
+    units = []
+    for clause in clauses:
+        clause = tuple(set(clause))
+        if not clause:
+            return None
+        if any(-literal in clause for literal in clause):
+            continue
+        if len(clause) == 1:
+            units.append(clause[0])
+            continue
+        index = len(watched)
+        watched.append(list(clause))
+        watches.setdefault(clause[0], []).append(index)
+        watches.setdefault(clause[1], []).append(index)
+
+    def propagate() -> bool:
+        while pending:
+            literal = pending.pop()
+            false_literal = -literal
+            watching = watches.get(false_literal, [])
+            kept = []
+            conflict = False
+            for position, index in enumerate(watching):
+                if conflict:
+                    kept.append(index)
+                    continue
+                clause = watched[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if is_true(clause[0]):
+                    kept.append(index)
+                    continue
+                for j in range(2, len(clause)):
+                    if not is_false(clause[j]):
+                        clause[1], clause[j] = clause[j], clause[1]
+                        watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if not assign(clause[0]):
+                        conflict = True
+            watches[false_literal] = kept
+            if conflict:
+                pending.clear()
+                return False
+        return True
+
+    for literal in units + list(assumptions):
+        if not assign(literal):
+            return None
+    if not propagate():
+        return None
+
+    occurrences = [0] * (num_variables + 1)
+    for clause in watched:
+        for literal in clause:
+            occurrences[abs(literal)] += 1
+    order = sorted(range(1, num_variables + 1), key=lambda variable: -occurrences[variable])
+
+    decisions: List[Tuple[int, int, bool]] = []
+    while True:
+        variable = next((v for v in order if not value[v]), None)
+        if variable is None:
+            return {v: value[v] > 0 for v in range(1, num_variables + 1)}
+
+        decisions.append((len(trail), variable, False))
+        assign(variable)
+        while not propagate():
+            while decisions and decisions[-1][2]:
+                decisions.pop()
+            if not decisions:
+                return None
+            size, variable, _ = decisions.pop()
+            for undone in trail[size:]:
+                value[abs(undone)] = 0
+            del trail[size:]
+            decisions.append((size, variable, True))
+            assign(-variable)
+
+def satisfiable(knowledge: SentenceType, assumptions: List[SentenceType] = ()) -> bool:
+    cnf = CNF()
+    cnf.add(knowledge)
+    for assumption in assumptions:
+        cnf.add(assumption)
+    return dpll(cnf.clauses, cnf.num_variables) is not None
+
+def entails(knowledge: SentenceType, query: SentenceType) -> bool:
+    return not satisfiable(knowledge, [Not(query)])
@@ -0,0 +1,128 @@
+import glob
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+ARCHIVO_ESTADO = "estado.json"
+TAMANO_TROZO = 10000
+
+@dataclass
+class AgregadoOnline:
+    num_juegos: int = 0
+    suma_intentos: int = 0
+    histograma: Counter = field(default_factory=Counter)
+    sumas_espacio: List[int] = field(default_factory=list)
+    ultimos_por_longitud: Counter = field(default_factory=Counter)
+    juegos_por_longitud: Counter = field(default_factory=Counter)
+
+    def agregar(self, intentos: int, historia: List[int]) -> None:
+        self.num_juegos += 1
+        self.suma_intentos += intentos
+        self.histograma[intentos] += 1
+        while len(self.sumas_espacio) < len(historia):
+            self.sumas_espacio.append(0)
+        for j, tamano in enumerate(historia):
+            self.sumas_espacio[j] += tamano
+        self.ultimos_por_longitud[len(historia)] += historia[-1] if historia else 0
+        self.juegos_por_longitud[len(historia)] += 1
+
+    def promedio_espacio_por_intento(self) -> np.ndarray:
+        max_intentos = len(self.sumas_espacio)
+        relleno = np.zeros(max_intentos + 1)
+        for longitud, suma in self.ultimos_por_longitud.items():
+            relleno[longitud] += suma
+        promedio = np.array(self.sumas_espacio, dtype=float) + np.cumsum(relleno)[:max_intentos]
+        return promedio / max(1, self.num_juegos)
+
+    def resultados(self) -> dict:
+        return {
+            'promedio_intentos': self.suma_intentos / self.num_juegos if self.num_juegos else float('nan'),
+            'promedio_espacio_por_intento': self.promedio_espacio_por_intento(),
+            'max_intentos': len(self.sumas_espacio),
+            'num_juegos': self.num_juegos,
+            'histograma_intentos': dict(sorted(self.histograma.items())),
+            'peor_caso': max(self.histograma) if self.histograma else 0,
+        }
+
+    def a_dict(self) -> dict:
+        return {
+            'num_juegos': self.num_juegos,
+            'suma_intentos': self.suma_intentos,
+            'histograma': {str(k): v for k, v in self.histograma.items()},
+            'sumas_espacio': self.sumas_espacio,
+            'ultimos_por_longitud': {str(k): v for k, v in self.ultimos_por_longitud.items()},
+            'juegos_por_longitud': {str(k): v for k, v in self.juegos_por_longitud.items()},
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "AgregadoOnline":
+        return cls(
+            datos['num_juegos'], datos['suma_intentos'],
+            Counter({int(k): v for k, v in datos['histograma'].items()}),
+            list(datos['sumas_espacio']),
+            Counter({int(k): v for k, v in datos['ultimos_por_longitud'].items()}),
+            Counter({int(k): v for k, v in datos['juegos_por_longitud'].items()}),
+        )
+
+class EscritorTrozos:
+
+    def __init__(self, directorio: str, tamano_trozo: int = TAMANO_TROZO, siguiente_trozo: int = 0):
+        self.directorio = directorio
+        self.tamano_trozo = tamano_trozo
+        self.siguiente_trozo = siguiente_trozo
+        self._intentos: List[int] = []
+        self._historias: List[List[int]] = []
+        os.makedirs(directorio, exist_ok=True)
+
+    def agregar(self, intentos: int, historia: List[int]) -> None:
+        self._intentos.append(intentos)
+        self._historias.append(historia)
+
+    def lleno(self) -> bool:
+        return len(self._intentos) >= self.tamano_trozo
+
+    def volcar(self) -> Optional[str]:
+        if not self._intentos:
+            return None
+        longitudes = np.array([len(historia) for historia in self._historias], dtype=np.int16)
+        espacio = np.full((len(self._historias), int(longitudes.max())), -1, dtype=np.int64)
+        for i, historia in enumerate(self._historias):
+            espacio[i, :len(historia)] = historia
+
+        ruta = os.path.join(self.directorio, f"trozo_{self.siguiente_trozo:06d}.npz")
+        temporal = ruta + ".tmp.npz"
+        np.savez_compressed(temporal, intentos=np.array(self._intentos, dtype=np.int16),
+                            longitudes=longitudes, espacio=espacio)
+        os.replace(temporal, ruta)
+
+        self.siguiente_trozo += 1
+        self._intentos, self._historias = [], []
+        return ruta
+
+def guardar_estado(directorio: str, estado: dict) -> None:
+    ruta = os.path.join(directorio, ARCHIVO_ESTADO)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w") as f:
+        json.dump(estado, f)
+    os.replace(temporal, ruta)
+
+def cargar_estado(directorio: str) -> Optional[dict]:
+    ruta = os.path.join(directorio, ARCHIVO_ESTADO)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta) as f:
+        return json.load(f)
+
+def descartar_trozos_huerfanos(directorio: str, siguiente_trozo: int) -> None:
+    for ruta in glob.glob(os.path.join(directorio, "trozo_*.npz")):
+        nombre = os.path.basename(ruta)
+        if ".tmp" in nombre or int(nombre[len("trozo_"):len("trozo_") + 6]) >= siguiente_trozo:
+            os.remove(ruta)
+
+def leer_trozos(directorio: str) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    for ruta in sorted(glob.glob(os.path.join(directorio, "trozo_[0-9][0-9][0-9][0-9][0-9][0-9].npz"))):
+        with np.load(ruta) as datos:
+            yield datos['intentos'], datos['longitudes'], datos['espacio']
@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from conjunto_candidatos import ConjuntoCandidatos
+from estrategias import plazo_desde_presupuesto
+from libro_aperturas import obtener_libro
+from mastermind_solver import COLORES, Combinacion, MastermindKB
+
+LIMITE_CODIGOS_SESION = 1 << 16
+LIMITE_POSICIONES_SESION = LIMITE_CODIGOS_SESION.bit_length() - 1
+
+def _calcular_jugada(colores: Tuple[str, ...], num_posiciones: int, estrategia: str,
+                     mascara: int, historial: List[Tuple[int, int]],
+                     plazo: Optional[float] = None) -> int:
+    kb = MastermindKB(colores=colores, num_posiciones=num_posiciones, estrategia=estrategia,
+                      presupuesto=None if plazo is None else math.inf)
+    kb.combinaciones_posibles = ConjuntoCandidatos(mascara, kb.motor.num_codigos)
+    kb.historial = historial
+    return kb.motor.indice_de(kb.siguiente_combinacion(plazo))
+
+def _preparar_libro(colores: Tuple[str, ...], num_posiciones: int, estrategia: str) -> None:
+    obtener_libro(colores, num_posiciones, estrategia)
+
+class ErrorSesion(Exception):
+    pass
+
+@dataclass
+class SesionJuego:
+    id: str
+    kb: MastermindKB
+    intentos: int = 0
+    historia_espacio_busqueda: List[int] = field(default_factory=list)
+    jugada_actual: Optional[Combinacion] = None
+    resuelta: bool = False
+    bloqueo: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+class GestorSesiones:
+
+    def __init__(self, ejecutor: Optional[Executor] = None, presupuesto: Optional[float] = None):
+        self.sesiones: Dict[str, SesionJuego] = {}
+        self.ejecutor = ejecutor
+        self.presupuesto = presupuesto
+        self._contador = itertools.count(1)
+        self._libros: Dict[Tuple, asyncio.Task] = {}
+
+    def crear_sesion(self, estrategia: str = "knuth", colores: Sequence[str] = COLORES,
+                     num_posiciones: int = 4) -> str:
+        if (not isinstance(colores, (list, tuple)) or not colores
+                or not all(isinstance(color, str) and color for color in colores)
+                or len(set(colores)) != len(colores)):
+            raise ErrorSesion("los colores deben ser una lista de nombres distintos")
+        if num_posiciones < 1:
+            raise ErrorSesion("el número de posiciones debe ser positivo")
+        if num_posiciones > LIMITE_POSICIONES_SESION:
+            raise ErrorSesion(f"el número de posiciones no puede superar {LIMITE_POSICIONES_SESION}")
+        if len(colores) ** num_posiciones > LIMITE_CODIGOS_SESION:
+            raise ErrorSesion(f"el tablero de {len(colores)} colores y {num_posiciones} posiciones "
+                              f"supera el límite de {LIMITE_CODIGOS_SESION} combinaciones")
+        kb = MastermindKB(colores=colores, num_posiciones=num_posiciones, estrategia=estrategia,
+                          presupuesto=self.presupuesto)
+        if not isinstance(kb.estrategia, str):
+            raise ErrorSesion("el servicio sólo admite estrategias registradas por nombre")
+        id_sesion = f"s{next(self._contador)}"
+        self.sesiones[id_sesion] = SesionJuego(
+            id_sesion, kb, historia_espacio_busqueda=[kb.tamano_espacio_busqueda()]
+        )
+        return id_sesion
+
+    def obtener_sesion(self, id_sesion: str) -> SesionJuego:
+        try:
+            return self.sesiones[id_sesion]
+        except KeyError:
+            raise ErrorSesion(f"sesión '{id_sesion}' no existe")
+
+    def cerrar_sesion(self, id_sesion: str) -> None:
+        self.obtener_sesion(id_sesion)
+        del self.sesiones[id_sesion]
+
+    async def siguiente_jugada(self, id_sesion: str) -> Combinacion:
+        plazo = plazo_desde_presupuesto(self.presupuesto)
+        sesion = self.obtener_sesion(id_sesion)
+        async with sesion.bloqueo:
+            if sesion.resuelta:
+                raise ErrorSesion("la sesión ya fue resuelta")
+            if sesion.jugada_actual is None:
+                sesion.jugada_actual = await self._calcular(sesion.kb, plazo)
+                sesion.intentos += 1
+            return sesion.jugada_actual
+
+    async def _libro_listo(self, kb: MastermindKB) -> None:
+        clave = (tuple(kb.colores), kb.num_posiciones, kb.estrategia)
+        tarea = self._libros.get(clave)
+        if tarea is None:
+            tarea = self._libros[clave] = asyncio.ensure_future(self._preparar_libro(*clave))
+        try:
+            await asyncio.shield(tarea)
+        except Exception:
+            if self._libros.get(clave) is tarea:
+                del self._libros[clave]
+            raise
+
+    async def _preparar_libro(self, colores: Tuple[str, ...], num_posiciones: int, estrategia: str) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.ejecutor, _preparar_libro, colores, num_posiciones, estrategia)
+        await asyncio.to_thread(obtener_libro, colores, num_posiciones, estrategia)
+
+    async def _calcular(self, kb: MastermindKB, plazo: Optional[float] = None) -> Combinacion:
+        if kb._usa_libro():
+            await self._libro_listo(kb)
+        jugada = kb._jugada_conocida()
+        if jugada is not None:
+            return kb.todas_combinaciones[jugada]
+        if len(kb.combinaciones_posibles) <= 2:
+            return kb.siguiente_combinacion(plazo)
+
+        loop = asyncio.get_running_loop()
+        indice = await loop.run_in_executor(
+            self.ejecutor, _calcular_jugada, tuple(kb.colores), kb.num_posiciones,
+            kb.estrategia, kb.combinaciones_posibles.mascara, list(kb.historial), plazo
+        )
+        kb._memorizar_jugada(indice)
+        return kb.todas_combinaciones[indice]
+
+    async def enviar_feedback(self, id_sesion: str, posiciones_correctas: int,
+                              colores_correctos: int) -> int:
+        sesion = self.obtener_sesion(id_sesion)
+        async with sesion.bloqueo:
+            if sesion.jugada_actual is None:
+                raise ErrorSesion("no hay una jugada pendiente de feedback")
+
+            kb = sesion.kb
+            if (posiciones_correctas < 0 or colores_correctos < 0
+                    or posiciones_correctas + colores_correctos > kb.num_posiciones):
+                raise ErrorSesion("feedback inválido")
+
+            if posiciones_correctas == kb.num_posiciones:
+                sesion.resuelta = True
+                sesion.jugada_actual = None
+                return 1
+
+            indice = kb.motor.indice_de(sesion.jugada_actual)
+            codigo = kb.motor.codificar(posiciones_correctas, colores_correctos)
+            if not kb.motor.filtrar(kb.combinaciones_posibles, indice, codigo):
+                raise ErrorSesion("ninguna combinación coincide con el feedback; revise la respuesta")
+
+            kb.actualizar_con_feedback(sesion.jugada_actual, posiciones_correctas, colores_correctos)
+            sesion.jugada_actual = None
+            sesion.historia_espacio_busqueda.append(kb.tamano_espacio_busqueda())
+            return kb.tamano_espacio_busqueda()
+
+    def tamano_espacio_busqueda(self, id_sesion: str) -> int:
+        return self.obtener_sesion(id_sesion).kb.tamano_espacio_busqueda()
+
+class ServicioMastermind:
+
+    def __init__(self, gestor: GestorSesiones):
+        self.gestor = gestor
+
+    async def procesar(self, solicitud: dict) -> dict:
+        respuesta = {"id": solicitud.get("id")}
+        try:
+            operacion = solicitud.get("op")
+            if operacion == "crear":
+                respuesta["sesion"] = self.gestor.crear_sesion(
+                    solicitud.get("estrategia", "knuth"),
+                    solicitud.get("colores", COLORES),
+                    int(solicitud.get("posiciones", 4)),
+                )
+            elif operacion == "jugada":
+                respuesta["jugada"] = list(await self.gestor.siguiente_jugada(solicitud["sesion"]))
+            elif operacion == "feedback":
+                tamano = await self.gestor.enviar_feedback(
+                    solicitud["sesion"], int(solicitud["negras"]), int(solicitud["blancas"])
+                )
+                sesion = self.gestor.obtener_sesion(solicitud["sesion"])
+                respuesta["tamano"] = tamano
+                respuesta["resuelta"] = sesion.resuelta
+                respuesta["intentos"] = sesion.intentos
+            elif operacion == "tamano":
+                respuesta["tamano"] = self.gestor.tamano_espacio_busqueda(solicitud["sesion"])
+            elif operacion == "cerrar":
+                self.gestor.cerrar_sesion(solicitud["sesion"])
+            else:
+                raise ErrorSesion(f"operación '{operacion}' no válida")
+            respuesta["ok"] = True
+        except (ErrorSesion, KeyError, ValueError, TypeError) as error:
+            respuesta["ok"] = False
+            respuesta["error"] = str(error)
+        except Exception as error:
+            print(f"Error interno atendiendo {solicitud!r}: {error!r}", file=sys.stderr)
+            respuesta["ok"] = False
+            respuesta["error"] = f"error interno: {type(error).__name__}"
+        return respuesta
+
+    async def atender_flujo(self, lector: asyncio.StreamReader, escribir) -> None:
+        pendientes = set()
+
+        async def responder(linea: bytes) -> None:
+            try:
+                solicitud = json.loads(linea)
+                if not isinstance(solicitud, dict):
+                    raise ValueError("la solicitud debe ser un objeto JSON")
+            except ValueError as error:
+                respuesta = {"ok": False, "error": f"JSON inválido: {error}"}
+            else:
+                respuesta = await self.procesar(solicitud)
+            await escribir(json.dumps(respuesta, ensure_ascii=False) + "\n")
+
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                break
+            if not linea.strip():
+                continue
+            tarea = asyncio.create_task(responder(linea))
+            pendientes.add(tarea)
+            tarea.add_done_callback(pendientes.discard)
+
+        if pendientes:
+            await asyncio.gather(*pendientes)
+
+    async def servir_tcp(self, host: str, puerto: int) -> None:
+        async def atender(lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+            async def escribir(texto: str) -> None:
+                escritor.write(texto.encode("utf-8"))
+                await escritor.drain()
+
+            try:
+                await self.atender_flujo(lector, escribir)
+            finally:
+                escritor.close()
+
+        servidor = await asyncio.start_server(atender, host, puerto)
+        print(f"Servicio Mastermind escuchando en {host}:{puerto}", file=sys.stderr)
+        async with servidor:
+            await servidor.serve_forever()
+
+    async def servir_stdio(self) -> None:
+        loop = asyncio.get_running_loop()
+        lector = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(lector), sys.stdin)
+
+        async def escribir(texto: str) -> None:
+            sys.stdout.write(texto)
+            sys.stdout.flush()
+
+        await self.atender_flujo(lector, escribir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio de sesiones Mastermind (JSON por líneas)")
+    parser.add_argument("--tcp", metavar="HOST:PUERTO", help="escuchar en TCP en lugar de stdin/stdout")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="procesos de cálculo (0 usa hilos del propio proceso)")
+    parser.add_argument("--presupuesto", type=float, default=None,
+                        help="segundos máximos para elegir cada jugada (sin límite por defecto)")
+    args = parser.parse_args()
+
+    ejecutor = ThreadPoolExecutor() if args.procesos == 0 else ProcessPoolExecutor(args.procesos)
+    servicio = ServicioMastermind(GestorSesiones(ejecutor, args.presupuesto))
+    try:
+        if args.tcp:
+            host, _, puerto = args.tcp.rpartition(":")
+            asyncio.run(servicio.servir_tcp(host or "127.0.0.1", int(puerto)))
+        else:
+            asyncio.run(servicio.servir_stdio())
+    finally:
+        ejecutor.shutdown()
+
+if __name__ == "__main__":
+    main()
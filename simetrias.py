@@ -0,0 +1,73 @@
+import itertools
+import math
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from motor_feedback import TAMANO_BLOQUE, MotorFeedback
+
+LIMITE_SIMETRIA = 1 << 16
+LIMITE_PERMUTACIONES = 720
+LIMITE_ENUMERACION = 40320
+
+Simetria = Tuple[Tuple[int, ...], np.ndarray]
+
+def simetrias_preservadas(motor: MotorFeedback, jugadas_previas: Sequence[int]) -> List[Simetria]:
+    filas = motor.digitos_de(np.asarray(jugadas_previas, dtype=motor.tipo_indice)).tolist()
+    simetrias = []
+    for sigma in itertools.permutations(range(motor.num_posiciones)):
+        mapa = {}
+        if all(mapa.setdefault(fila[origen], fila[destino]) == fila[destino]
+               for fila in filas for destino, origen in enumerate(sigma)):
+            if len(set(mapa.values())) != len(mapa):
+                continue
+            colores = np.arange(motor.num_colores, dtype=np.uint8)
+            for origen, destino in mapa.items():
+                colores[origen] = destino
+            simetrias.append((sigma, colores))
+    return simetrias
+
+def _renombrar_libres(digitos: np.ndarray, libres: np.ndarray) -> np.ndarray:
+    num_filas, num_posiciones = digitos.shape
+    es_libre = np.zeros(max(int(digitos.max(initial=0)), int(libres.max(initial=0))) + 1, dtype=bool)
+    es_libre[libres] = True
+    asignados = np.full((num_filas, len(es_libre)), -1, dtype=np.int16)
+    siguientes = np.zeros(num_filas, dtype=np.int64)
+    filas = np.arange(num_filas)
+    resultado = digitos.copy()
+    for posicion in range(num_posiciones):
+        colores = digitos[:, posicion]
+        nuevos = es_libre[colores] & (asignados[filas, colores] < 0)
+        asignados[filas[nuevos], colores[nuevos]] = libres[siguientes[nuevos]]
+        siguientes[nuevos] += 1
+        libre = es_libre[colores]
+        resultado[libre, posicion] = asignados[filas[libre], colores[libre]]
+    return resultado
+
+@lru_cache(maxsize=256)
+def _representantes(motor: MotorFeedback, jugadas_previas: Tuple[int, ...]) -> Optional[np.ndarray]:
+    if motor.num_codigos > LIMITE_SIMETRIA:
+        return None
+    if math.factorial(motor.num_posiciones) > LIMITE_PERMUTACIONES and not jugadas_previas:
+        return None
+    if math.factorial(motor.num_posiciones) > LIMITE_ENUMERACION:
+        return None
+
+    simetrias = simetrias_preservadas(motor, jugadas_previas)
+    usados = np.unique(motor.digitos_de(np.asarray(jugadas_previas, dtype=motor.tipo_indice)))
+    libres = np.setdiff1d(np.arange(motor.num_colores), usados).astype(np.uint8)
+    if len(simetrias) > LIMITE_PERMUTACIONES or (len(simetrias) == 1 and len(libres) <= 1):
+        return None
+
+    representantes = []
+    for inicio in range(0, motor.num_codigos, TAMANO_BLOQUE):
+        indices = np.arange(inicio, min(inicio + TAMANO_BLOQUE, motor.num_codigos), dtype=motor.tipo_indice)
+        digitos = motor.digitos_de(indices)
+        canonicos = indices.copy()
+        for sigma, colores in simetrias:
+            imagen = _renombrar_libres(colores[digitos[:, list(sigma)]], libres)
+            canonicos = np.minimum(canonicos, imagen.astype(motor.tipo_indice) @ motor.potencias)
+        representantes.append(indices[canonicos == indices])
+    return np.concatenate(representantes)
+
+def representantes(motor: MotorFeedback, jugadas_previas: Sequence[int]) -> Optional[np.ndarray]:
+    return _representantes(motor, tuple(sorted(set(int(jugada) for jugada in jugadas_previas))))
@@ -0,0 +1,104 @@
+import argparse
+import os
+import struct
+import time
+import zlib
+from typing import Optional, Sequence
+import numpy as np
+from motor_feedback import MotorFeedback, obtener_motor
+
+DIRECTORIO_TABLAS = os.environ.get(
+    "MASTERMIND_TABLAS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablas")
+)
+MAGIA = b"MMFB"
+VERSION = 1
+CODIFICACION_NEGRAS_BLANCAS = 1
+CODIFICACION_NEGRAS_BLANCAS_16 = 2
+FORMATO_CABECERA = "<4sHHHHQI"
+TAMANO_CABECERA = 64
+LIMITE_TABLA = 1 << 15
+FILAS_POR_BLOQUE = 256
+
+def huella_colores(colores: Sequence[str]) -> int:
+    return zlib.crc32(",".join(colores).encode("utf-8"))
+
+def ruta_tabla(colores: Sequence[str], num_posiciones: int) -> str:
+    nombre = f"feedback_{num_posiciones}x{len(colores)}_{huella_colores(colores):08x}.tabla"
+    return os.path.join(DIRECTORIO_TABLAS, nombre)
+
+def _codificacion(motor: MotorFeedback) -> int:
+    return CODIFICACION_NEGRAS_BLANCAS if motor.tipo_feedback == np.uint8 else CODIFICACION_NEGRAS_BLANCAS_16
+
+def _tipo_tabla(motor: MotorFeedback) -> np.dtype:
+    return np.dtype(motor.tipo_feedback).newbyteorder("<")
+
+def _cabecera(motor: MotorFeedback) -> bytes:
+    cabecera = struct.pack(FORMATO_CABECERA, MAGIA, VERSION, motor.num_posiciones, motor.num_colores,
+                           _codificacion(motor), motor.num_codigos, huella_colores(motor.colores))
+    return cabecera.ljust(TAMANO_CABECERA, b"\0")
+
+def construir_tabla(motor: MotorFeedback, ruta: Optional[str] = None) -> str:
+    if motor.num_codigos > LIMITE_TABLA:
+        raise MemoryError(
+            f"Una tabla de {motor.num_codigos} códigos ocuparía {motor.num_codigos ** 2 * _tipo_tabla(motor).itemsize / 2 ** 30:.1f} GiB; "
+            f"el límite es {LIMITE_TABLA} códigos"
+        )
+    ruta = ruta or ruta_tabla(motor.colores, motor.num_posiciones)
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    todas = np.arange(motor.num_codigos)
+    with open(temporal, "wb") as f:
+        f.write(_cabecera(motor))
+        for inicio in range(0, motor.num_codigos, FILAS_POR_BLOQUE):
+            filas = np.arange(inicio, min(inicio + FILAS_POR_BLOQUE, motor.num_codigos))
+            f.write(motor._calcular_feedback(filas, todas).astype(_tipo_tabla(motor)).tobytes())
+    os.replace(temporal, ruta)
+    return ruta
+
+def abrir_tabla(motor: MotorFeedback, ruta: Optional[str] = None) -> Optional[np.ndarray]:
+    ruta = ruta or ruta_tabla(motor.colores, motor.num_posiciones)
+    try:
+        with open(ruta, "rb") as f:
+            cabecera = f.read(TAMANO_CABECERA)
+        tamano = os.path.getsize(ruta)
+    except OSError:
+        return None
+
+    if len(cabecera) < TAMANO_CABECERA:
+        print(f"ADVERTENCIA: La tabla de feedback '{ruta}' está truncada; se ignora.")
+        return None
+    magia, version, num_posiciones, num_colores, codificacion, num_codigos, huella = struct.unpack_from(
+        FORMATO_CABECERA, cabecera
+    )
+    esperada = (MAGIA, VERSION, motor.num_posiciones, motor.num_colores, _codificacion(motor),
+                motor.num_codigos, huella_colores(motor.colores))
+    if (magia, version, num_posiciones, num_colores, codificacion, num_codigos, huella) != esperada:
+        print(f"ADVERTENCIA: La tabla de feedback '{ruta}' no corresponde a este tablero "
+              f"o tiene otra versión; se ignora.")
+        return None
+    tipo = _tipo_tabla(motor)
+    if tamano != TAMANO_CABECERA + num_codigos * num_codigos * tipo.itemsize:
+        print(f"ADVERTENCIA: La tabla de feedback '{ruta}' está truncada; se ignora.")
+        return None
+
+    return np.memmap(ruta, dtype=tipo, mode="r", offset=TAMANO_CABECERA,
+                     shape=(num_codigos, num_codigos)).view(np.ndarray)
+
+def main():
+    from mastermind_solver import COLORES
+
+    parser = argparse.ArgumentParser(description="Construye la tabla de feedback compartida de un tablero")
+    parser.add_argument("--colores", default=",".join(COLORES), help="lista de colores separada por comas")
+    parser.add_argument("--posiciones", type=int, default=4)
+    parser.add_argument("--salida", default=None, help="ruta de la tabla (por defecto en el directorio de tablas)")
+    args = parser.parse_args()
+
+    colores = tuple(color.strip() for color in args.colores.split(",") if color.strip())
+    motor = obtener_motor(colores, args.posiciones)
+    inicio = time.time()
+    ruta = construir_tabla(motor, args.salida)
+    print(f"Tabla de {motor.num_codigos}x{motor.num_codigos} guardada en '{ruta}' "
+          f"({os.path.getsize(ruta) / 2 ** 20:.1f} MiB, {time.time() - inicio:.1f} segundos)")
+
+if __name__ == "__main__":
+    main()